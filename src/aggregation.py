@@ -0,0 +1,332 @@
+import numpy as np
+import pandas as pd
+
+from tooltips import format_ranks, rank_tooltips
+
+# Group counts are accumulated in a dense np.bincount table while the number of
+# possible groups stays below this size, and with np.unique on the combined codes above it
+MAX_DENSE_GROUPS = 1 << 22
+
+# Labels of the Title Fiction Tag values, as shown by the category charts
+FICTION_LABELS = {'Yes': 'Fiction', 'No': 'Non-Fiction'}
+
+# Columns the Overview count tables are computed from
+OVERVIEW_COLUMNS = ['Item Media', 'Title Fiction Tag', 'Title Publisher', 'Title Author',
+                    'Publication Year', 'Txn Calendar Year']
+
+# Ranked Overview tables: (result key, column), most frequent first in the order
+# value_counts() returns them
+RANKED_TABLES = [
+    ('media', 'Item Media'),
+    ('category', 'Title Fiction Tag'),
+    ('publishers', 'Title Publisher'),
+    ('authors', 'Title Author'),
+]
+
+# Grouped Overview tables: (result key, columns), ordered by value; 'Category'
+# is the category label of the Title Fiction Tag, see category_codes()
+GROUPED_TABLES = [
+    ('treemap', ['Title Publisher', 'Title Author']),
+    ('publication_years', ['Publication Year', 'Category']),
+    ('transaction_years', ['Txn Calendar Year', 'Item Media']),
+]
+
+
+def column_codes(column):
+    """
+    Returns the integer codes of a categorical or integer column and the values they index.
+
+    Codes follow the sort order of the values, as groupby(sort=True) does, and
+    missing values get the code -1.
+
+    Parameters:
+    - column (Series): A categorical or (nullable) integer column.
+
+    Returns:
+    - tuple: (codes, values) where values[codes[i]] is the value of row i.
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return np.asarray(column.array.codes, dtype=np.int64), column.cat.categories
+
+    # Integer columns are offset from their minimum instead of being factorized
+    missing = column.isna().to_numpy()
+    values = column.to_numpy(dtype=np.int64, na_value=0)
+    present = values[~missing]
+    low = int(present.min()) if len(present) else 0
+    high = int(present.max()) if len(present) else -1
+    codes = np.where(missing, -1, values - low)
+    return codes, pd.Index(pd.array(np.arange(low, high + 1), dtype=column.dtype))
+
+
+def grouped_counts(columns, names, weights=None):
+    """
+    Counts the rows of every combination of column values, like groupby(...).size().
+
+    The code arrays are combined into a single code per row and counted in one
+    pass. Rows with a missing value are left out, only combinations that occur
+    are returned, and groups are ordered by their values.
+
+    Parameters:
+    - columns (list): (codes, values) pairs from column_codes(), one per grouping column.
+    - names (list): Column names of the result.
+    - weights (ndarray): Optional number of rows each entry stands for, e.g. the
+      group counts of a pre-aggregated table.
+
+    Returns:
+    - DataFrame: One row per group, with a column per grouping column and 'Count'.
+    """
+    codes = [column[0] for column in columns]
+    sizes = [len(column[1]) for column in columns]
+    valid = np.logical_and.reduce([column_codes >= 0 for column_codes in codes])
+    combined = np.ravel_multi_index([column_codes[valid] for column_codes in codes], sizes) if sizes else codes
+    weights = weights[valid] if weights is not None else None
+
+    if np.prod(sizes, dtype=np.int64) <= MAX_DENSE_GROUPS:
+        counts = np.bincount(combined, weights=weights, minlength=int(np.prod(sizes, dtype=np.int64)))
+        groups = np.flatnonzero(counts)
+        counts = counts[groups].astype(np.int64)
+    else:
+        groups, inverse, counts = np.unique(combined, return_inverse=True, return_counts=True)
+        if weights is not None:
+            counts = np.bincount(inverse, weights=weights).astype(np.int64)
+
+    group_codes = np.unravel_index(groups, sizes)
+    table = {name: values[column_group_codes]
+             for name, (_, values), column_group_codes in zip(names, columns, group_codes)}
+    table['Count'] = counts
+    return pd.DataFrame(table)
+
+
+def ranked_counts(codes, values, name, weights=None):
+    """
+    Counts the occurrences of each value, most frequent first, in the order value_counts() returns them.
+
+    Values that do not occur are left out; see sort_counts() for the order of ties.
+
+    Parameters:
+    - codes (ndarray): Row codes from column_codes().
+    - values (Index): The values the codes index.
+    - name (str): Name of the resulting index.
+    - weights (ndarray): Optional number of rows each entry stands for; entries
+      must then be in the order of their first row.
+
+    Returns:
+    - Series: Counts indexed by value.
+    """
+    valid = codes >= 0
+    codes = codes[valid]
+    weights = weights[valid] if weights is not None else None
+    counts = np.bincount(codes, weights=weights, minlength=len(values)).astype(np.int64)
+
+    return ranked_table(counts, first_positions(codes, np.arange(len(codes)), len(values)), values, name)
+
+
+def first_positions(codes, positions, size):
+    """
+    Returns the smallest position at which each code occurs, or the largest
+    possible int64 for codes that do not occur.
+
+    Parameters:
+    - codes (ndarray): Non-negative codes.
+    - positions (ndarray): Ascending position of each code, e.g. its row.
+    - size (int): Number of possible codes.
+    """
+    # Assigning in reverse order leaves the earliest position in place for repeated codes
+    first_seen = np.full(size, np.iinfo(np.int64).max)
+    first_seen[codes[::-1]] = positions[::-1]
+    return first_seen
+
+
+def ranked_table(counts, first_seen, values, name):
+    """
+    Orders the values that occur by count, most frequent first, as value_counts() does.
+
+    Parameters:
+    - counts (ndarray): Count of each value code.
+    - first_seen (ndarray): First occurrence of each value code, from first_positions().
+    - values (Index): The values the codes index.
+    - name (str): Name of the resulting index.
+
+    Returns:
+    - Series: Counts indexed by value, as ranked_counts() returns them.
+    """
+    present = np.flatnonzero(counts)
+    present = present[np.argsort(first_seen[present], kind='stable')]
+    return sort_counts(counts[present], values[present], name)
+
+
+def sort_counts(counts, values, name):
+    """
+    Sorts counts listed in the order their values first appear, most frequent first.
+
+    value_counts() on a string column lists the values in the order they first
+    appear and then sorts them with Series.sort_values(), whose quicksort does
+    not keep ties in that order once there are more than a few values. The
+    same call on the same counts reproduces its order, ties included.
+
+    Parameters:
+    - counts (ndarray): int64 counts, in the order their values first appear.
+    - values (Index): The value of each count.
+    - name (str): Name of the resulting index.
+
+    Returns:
+    - Series: Counts indexed by value.
+    """
+    return pd.Series(counts, index=pd.Index(values, name=name), name='count').sort_values(ascending=False)
+
+
+def category_codes(fiction_codes, fiction_values):
+    """
+    Recodes Title Fiction Tag codes into codes of the category labels.
+
+    Category labels are grouped as strings, so the tags are recoded into the
+    sorted label order; tags without a label show as 'nan', as with Series.map.
+
+    Returns:
+    - tuple: (codes, values) of the labels, as column_codes() returns them.
+    """
+    labels = fiction_values.map(FICTION_LABELS).astype(str)
+    label_values = pd.Index(sorted(set(labels)))
+    label_codes = label_values.get_indexer(labels)
+    return np.where(fiction_codes >= 0, label_codes[fiction_codes], -1), label_values
+
+
+def overview_aggregates(filtered_data):
+    """
+    Computes every count the Overview charts need in one pass over the encoded columns.
+
+    Parameters:
+    - filtered_data (DataFrame): The filtered dataset.
+
+    Returns:
+    - dict: Small result tables, keyed by chart:
+      - 'media' (Series): Titles per media type, most frequent first.
+      - 'category' (Series): Titles per fiction tag, most frequent first.
+      - 'publishers' (Series): Titles per publisher, most frequent first.
+      - 'authors' (Series): Titles per author, most frequent first.
+      - 'treemap' (DataFrame): Titles per publisher and author.
+      - 'publication_years' (DataFrame): Titles per publication year and category label.
+      - 'transaction_years' (DataFrame): Titles per transaction year and media type.
+    """
+    return overview_tables({column: column_codes(filtered_data[column]) for column in OVERVIEW_COLUMNS})
+
+
+def overview_tables(columns, weights=None):
+    """
+    Computes the Overview count tables from the codes of the OVERVIEW_COLUMNS.
+
+    Parameters:
+    - columns (dict): Column name -> (codes, values) from column_codes().
+    - weights (ndarray): Optional number of rows each entry stands for, with
+      entries in the order of their first row (see cube.AggregateCube).
+
+    Returns:
+    - dict: The tables described in overview_aggregates().
+    """
+    columns = {**columns, 'Category': category_codes(*columns['Title Fiction Tag'])}
+    tables = {key: ranked_counts(*columns[column], column, weights) for key, column in RANKED_TABLES}
+    for key, group_columns in GROUPED_TABLES:
+        tables[key] = grouped_counts([columns[column] for column in group_columns], group_columns, weights)
+    return tables
+
+
+def heatmap_aggregates(filtered_data, max_authors, tooltip_titles):
+    """
+    Ranks the top authors of every transaction year in one grouped pass.
+
+    Title counts, rank sums and rank counts are accumulated per year and author
+    at once. The top authors of each year are the first of the year's authors
+    in the order value_counts() ranks them (see sort_counts()), which are those
+    value_counts().nlargest() picks. The top N authors for any N up to
+    max_authors are a prefix of the result; see top_authors_table().
+
+    Parameters:
+    - filtered_data (DataFrame): The filtered dataset.
+    - max_authors (int): Largest number of top authors per year that will be shown.
+    - tooltip_titles (ndarray): Display titles by title code, from truncate_titles().
+
+    Returns:
+    - dict: For each year present in the data, a DataFrame with the columns
+      'Title Author', 'Author Code', 'Average_Rank' and 'Ranks_str' (the hover
+      text), most titles first.
+    """
+    year_codes, years = column_codes(filtered_data['Txn Calendar Year'])
+    author_codes, authors = column_codes(filtered_data['Title Author'])
+    ranks = filtered_data['Rank'].to_numpy(dtype=np.float64, na_value=np.nan)
+
+    # One code per (year, author) group; rows missing either are left out
+    rows = np.flatnonzero((year_codes >= 0) & (author_codes >= 0))
+    groups = year_codes[rows] * len(authors) + author_codes[rows]
+    n_groups = len(years) * len(authors)
+    ranked = ~np.isnan(ranks[rows])
+    counts = np.bincount(groups, minlength=n_groups)
+    rank_sums = np.bincount(groups[ranked], weights=ranks[rows][ranked], minlength=n_groups)
+    rank_counts = np.bincount(groups[ranked], minlength=n_groups)
+
+    # Position of each group's first row; assigning in reverse row order leaves
+    # the earliest row in place for repeated groups
+    first_seen = np.full(n_groups, len(rows))
+    first_seen[groups[::-1]] = np.arange(len(rows))[::-1]
+
+    # List each year's groups in order of first appearance, then rank them by
+    # count within the year as value_counts() would
+    present = np.flatnonzero(counts)
+    present = present[np.lexsort((first_seen[present], present // len(authors)))]
+    present_years = present // len(authors)
+    year_bounds = np.flatnonzero(np.r_[True, present_years[1:] != present_years[:-1], True])
+    top = np.concatenate([np.zeros(0, dtype=np.int64)] + [
+        sort_counts(counts[year_groups], year_groups, None).index[:max_authors].to_numpy()
+        for year_groups in (present[start:end] for start, end in zip(year_bounds[:-1], year_bounds[1:]))
+    ])
+
+    # Hover text of the top groups, built from their rows in one pass
+    in_top = np.zeros(n_groups, dtype=bool)
+    in_top[top] = True
+    top_rows = rows[in_top[groups]]
+    tooltips = rank_tooltips(
+        groups[in_top[groups]],
+        tooltip_titles[filtered_data['Title Native Name'].array.codes[top_rows]],
+        format_ranks(filtered_data['Rank'].iloc[top_rows])
+    )
+
+    # Average ranks of the top groups; groups with no ranks get NaN
+    with np.errstate(invalid='ignore', divide='ignore'):
+        average_ranks = rank_sums[top] / rank_counts[top]
+    top_years = top // len(authors)
+    tables = {}
+    for year_code in np.unique(top_years):
+        year_groups = top[top_years == year_code]
+        tables[int(years[year_code])] = pd.DataFrame({
+            'Title Author': authors[year_groups % len(authors)],
+            'Author Code': year_groups % len(authors),
+            'Average_Rank': average_ranks[top_years == year_code],
+            'Ranks_str': tooltips.loc[year_groups].to_numpy(),
+        })
+    return tables
+
+
+def top_authors_table(ranked_table, top_n_authors):
+    """
+    Returns the heatmap table of a year's top N authors, sorted by average rank.
+
+    Parameters:
+    - ranked_table (DataFrame or None): The year's table from heatmap_aggregates().
+    - top_n_authors (int): Number of top authors, at most the max_authors it was built for.
+
+    Returns:
+    - DataFrame or None: The columns 'Title Author', 'Average_Rank' and 'Ranks_str',
+      or None if the year has no data.
+    """
+    if ranked_table is None:
+        return None
+    top = ranked_table.iloc[:top_n_authors]
+
+    # Sort by average rank the way groupby().mean().sort_values() did: authors
+    # in category order, quicksort over the ranked ones (so ties keep the same
+    # order as before) and NaN last
+    top = top.iloc[np.argsort(top['Author Code'].to_numpy(), kind='stable')]
+    average_ranks = top['Average_Rank'].to_numpy()
+    ranked_rows = np.flatnonzero(~np.isnan(average_ranks))
+    order = np.r_[ranked_rows[np.argsort(average_ranks[ranked_rows], kind='quicksort')],
+                  np.flatnonzero(np.isnan(average_ranks))]
+    return top.iloc[order][['Title Author', 'Average_Rank', 'Ranks_str']].reset_index(drop=True)
@@ -0,0 +1,1611 @@
+"""
+Benchmarks for the dashboard's data and rendering paths.
+
+Run from the src directory, e.g.:
+
+    python benchmark.py fetch
+    python benchmark.py memory --rows 1000000 --workers 4
+    python benchmark.py encoding --rows 1000000
+    python benchmark.py filter --rows 5000000
+    python benchmark.py aggregation --rows 1000000
+    python benchmark.py cube --rows 1000000
+    python benchmark.py sql --rows 1000000 --backend sqlite duckdb
+    python benchmark.py incremental --rows 1000000
+    python benchmark.py callbacks
+    python benchmark.py patch
+    python benchmark.py templates
+    python benchmark.py serialization
+    python benchmark.py compression
+    python benchmark.py --repeat 3 initial
+    python benchmark.py slider
+    python benchmark.py search --values 200000
+    python benchmark.py tooltips --rows 1000000
+    python benchmark.py heatmaps --rows 1000000 --years 8
+"""
+import argparse
+import hashlib
+import http.server
+import json
+import multiprocessing
+import os
+import shutil
+import tempfile
+import threading
+import time
+from email.utils import formatdate
+
+import numpy as np
+import pandas as pd
+import pyarrow.feather as feather
+
+import data_loader
+from aggregation import OVERVIEW_COLUMNS, heatmap_aggregates, overview_aggregates, top_authors_table
+from cube import CUBE_DIMENSIONS, AggregateCube
+from figure_encoding import decode_array
+from filter_index import DateIndex, FilterIndex
+from incremental import DATE_DIMENSION, IncrementalFilter
+from query_cache import LRUCache
+from search_index import SEARCHED_COLUMNS, SearchIndex, update_search_indexes
+from sql_backend import QUERY_BACKENDS, open_backend
+from tooltips import format_ranks, rank_tooltips, truncate_titles
+
+
+def timed(func, *args, **kwargs):
+    """
+    Calls func and returns its result together with the elapsed wall time in seconds.
+    """
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+class WorkbookHandler(http.server.BaseHTTPRequestHandler):
+    """
+    Local stand-in for the GitHub raw endpoint serving a single workbook with ETag and Last-Modified.
+    """
+    content = b''
+    etag = ''
+    last_modified = ''
+    requests = []
+
+    def do_GET(self):
+        cls = type(self)
+        not_modified = (self.headers.get('If-None-Match') == cls.etag
+                        or self.headers.get('If-Modified-Since') == cls.last_modified)
+        cls.requests.append(304 if not_modified else 200)
+        if not_modified:
+            self.send_response(304)
+            self.send_header('ETag', cls.etag)
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet')
+        self.send_header('Content-Length', str(len(cls.content)))
+        self.send_header('ETag', cls.etag)
+        self.send_header('Last-Modified', cls.last_modified)
+        self.end_headers()
+        self.wfile.write(cls.content)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def serve_workbook(path):
+    """
+    Starts the workbook stand-in on a free local port and returns the server and its URL.
+    """
+    with open(path, 'rb') as f:
+        WorkbookHandler.content = f.read()
+    WorkbookHandler.etag = '"%s"' % hashlib.sha256(WorkbookHandler.content).hexdigest()
+    WorkbookHandler.last_modified = formatdate(os.path.getmtime(path), usegmt=True)
+    WorkbookHandler.requests = []
+    httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), WorkbookHandler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    return httpd, f'http://127.0.0.1:{httpd.server_address[1]}/workbook.xlsx'
+
+
+def bench_fetch(args):
+    """
+    Measures dataset load time for a cold start, a warm restart (304) and an offline restart.
+    """
+    httpd, url = serve_workbook(args.workbook)
+    cache_dir = tempfile.mkdtemp(prefix='nlb-bench-')
+    try:
+        cold = [timed(data_loader.load_dataset, url, cache_dir)[1]]
+        shutil.rmtree(cache_dir)
+        for _ in range(args.repeat - 1):
+            cold.append(timed(data_loader.load_dataset, url, cache_dir)[1])
+            shutil.rmtree(cache_dir)
+        data_loader.load_dataset(url, cache_dir)
+        warm = [timed(data_loader.load_dataset, url, cache_dir)[1] for _ in range(args.repeat)]
+        httpd.shutdown()
+        httpd.server_close()
+        offline = [timed(data_loader.load_dataset, url, cache_dir)[1] for _ in range(args.repeat)]
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+    print(f"Responses served: {WorkbookHandler.requests.count(200)} x 200, "
+          f"{WorkbookHandler.requests.count(304)} x 304")
+    for label, samples in (('cold start', cold), ('warm restart (304)', warm), ('offline restart', offline)):
+        print(f"{label:<20} best {min(samples) * 1000:8.1f} ms   mean {sum(samples) / len(samples) * 1000:8.1f} ms")
+    print(f"Restart time saved: {(min(cold) - min(warm)) * 1000:.1f} ms")
+
+
+def synthetic_dataset(n_rows, seed=0, years=4):
+    """
+    Builds a preprocessed dataset of n_rows by resampling rows of the real workbook.
+
+    Years, ranks and publication dates are redrawn so that filters and
+    aggregations see realistic cardinalities at larger scale; transaction
+    years are drawn from the given number of years starting at 2020.
+    """
+    base = data_loader.load_dataset()
+    rng = np.random.default_rng(seed)
+    data = base.iloc[rng.integers(0, len(base), n_rows)].reset_index(drop=True)
+    data['Txn Calendar Year'] = rng.integers(2020, 2020 + years, n_rows)
+    data['Rank'] = rng.integers(1, 101, n_rows)
+    offsets = pd.to_timedelta(rng.integers(-3650, 365, n_rows), unit='D')
+    data['Title Publication Date'] = (data['Title Publication Date'] + offsets).astype(
+        base['Title Publication Date'].dtype)
+    data['Publication Year'] = data['Title Publication Date'].dt.year
+    return data
+
+
+def process_memory():
+    """
+    Returns this process's proportional set size and private memory in bytes (Linux only).
+    """
+    fields = {}
+    with open('/proc/self/smaps_rollup') as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == 'kB':
+                fields[parts[0].rstrip(':')] = int(parts[1]) * 1024
+    return fields['Pss'], fields['Private_Clean'] + fields['Private_Dirty']
+
+
+def measure_worker(snapshot_path, mapped, barrier, results):
+    """
+    Loads the snapshot like an app worker, touches every column and reports the memory it added.
+    """
+    pss_before, private_before = process_memory()
+    if mapped:
+        data = data_loader.attach_dataset(snapshot_path)
+    else:
+        data = feather.read_table(snapshot_path, memory_map=False).to_pandas()
+    for column in data.columns:
+        data[column].nunique()
+    barrier.wait()
+    pss_after, private_after = process_memory()
+    results.put((pss_after - pss_before, private_after - private_before))
+    barrier.wait()
+
+
+def bench_memory(args):
+    """
+    Compares per-worker memory of the memory-mapped dataset against a private in-process copy.
+    """
+    os.makedirs(data_loader.CACHE_DIR, exist_ok=True)
+    cache_dir = tempfile.mkdtemp(prefix='bench-', dir=data_loader.CACHE_DIR)
+    try:
+        data = synthetic_dataset(args.rows) if args.rows else data_loader.load_dataset()
+        snapshot_path = os.path.join(cache_dir, data_loader.SNAPSHOT_FILE)
+        data_loader.write_snapshot(data, snapshot_path, 'benchmark')
+        print(f"Rows: {len(data):,}   snapshot size: {os.path.getsize(snapshot_path) / 2**20:.1f} MiB")
+        del data
+
+        context = multiprocessing.get_context('spawn')
+        for label, mapped in (('private copy', False), ('memory-mapped', True)):
+            barrier = context.Barrier(args.workers)
+            results = context.Queue()
+            workers = [context.Process(target=measure_worker, args=(snapshot_path, mapped, barrier, results))
+                       for _ in range(args.workers)]
+            for worker in workers:
+                worker.start()
+            samples = [results.get() for _ in workers]
+            for worker in workers:
+                worker.join()
+            pss = sum(sample[0] for sample in samples)
+            private = sum(sample[1] for sample in samples)
+            print(f"{label:<14} {args.workers} workers: total PSS +{pss / 2**20:8.1f} MiB   "
+                  f"private +{private / 2**20:8.1f} MiB")
+    finally:
+        shutil.rmtree(cache_dir, ignore_errors=True)
+
+
+def legacy_preprocess(data):
+    """
+    The preprocessing the dashboard used before columns were encoded, kept for comparison.
+    """
+    data['Title Publication Date'] = pd.to_datetime(data['Title Publication Date'], errors='coerce')
+    data['Publication Year'] = data['Title Publication Date'].dt.year
+    data['Item Media'] = data['Item Media'].str.title()
+    data['Title Native Name'] = data['Title Native Name'].astype(str)
+    data['Title Author'] = data['Title Author'].astype(str)
+    data['Title Publisher'] = data['Title Publisher'].astype(str)
+    data['Txn Calendar Year'] = data['Txn Calendar Year'].astype(int)
+    data['Subject'] = data['Subject'].astype(str)
+    data['Rank'] = data['Rank'].astype(int)
+    data['Title Fiction Tag'] = data['Title Fiction Tag'].astype(str)
+    return data
+
+
+def filter_workload(data):
+    """
+    Runs the filtering and aggregation operations update_charts performs for one request.
+    """
+    years = sorted(data['Txn Calendar Year'].unique())[:2]
+    media = sorted(data['Item Media'].unique())[:1]
+    filtered = data[data['Txn Calendar Year'].isin(years)]
+    filtered = filtered[filtered['Item Media'].isin(media)]
+    filtered = filtered[filtered['Title Fiction Tag'].isin(['Yes', 'No'])]
+    for column in ('Title Native Name', 'Title Author', 'Title Publisher'):
+        filtered[column].nunique()
+    for column in ('Item Media', 'Title Fiction Tag', 'Title Publisher', 'Title Author'):
+        filtered[column].value_counts()
+    filtered.groupby(['Title Publisher', 'Title Author'], observed=True).size()
+    filtered.groupby(['Txn Calendar Year', 'Item Media'], observed=True).size()
+    filtered.groupby('Title Author', observed=True)['Rank'].mean()
+
+
+def bench_encoding(args):
+    """
+    Compares memory and per-request filter/aggregation latency of the encoded frame and the legacy one.
+    """
+    raw = pd.read_excel(data_loader.BUNDLED_WORKBOOK, sheet_name='Sheet1')
+    if args.rows:
+        rng = np.random.default_rng(0)
+        raw = raw.iloc[rng.integers(0, len(raw), args.rows)].reset_index(drop=True)
+        raw['Txn Calendar Year'] = rng.integers(2020, 2024, args.rows)
+    frames = {
+        'legacy': legacy_preprocess(raw.copy()),
+        'encoded': data_loader.preprocess(raw.copy()),
+    }
+    results = {}
+    for label, data in frames.items():
+        memory = data.memory_usage(deep=True).sum()
+        filter_workload(data)
+        latency = min(timed(filter_workload, data)[1] for _ in range(args.repeat))
+        results[label] = (memory, latency)
+        print(f"{label:<8} memory {memory / 2**20:9.2f} MiB   request workload {latency * 1000:8.2f} ms")
+    (legacy_memory, legacy_latency), (encoded_memory, encoded_latency) = results['legacy'], results['encoded']
+    print(f"Saved {(1 - encoded_memory / legacy_memory) * 100:.0f}% memory and "
+          f"{(1 - encoded_latency / legacy_latency) * 100:.0f}% latency on {len(raw):,} rows")
+
+
+def filter_states(data, count, seed=0):
+    """
+    Draws random filter selections over the dropdown columns, as a user clicking around would.
+    """
+    rng = np.random.default_rng(seed)
+    years = sorted(int(year) for year in data['Txn Calendar Year'].unique())
+    dates = data['Title Publication Date'].dropna().to_numpy()
+    choices = {
+        'Subject': list(data['Subject'].cat.categories),
+        'Item Media': list(data['Item Media'].cat.categories),
+        'Title Author': list(data['Title Author'].cat.categories),
+        'Title Publisher': list(data['Title Publisher'].cat.categories),
+    }
+    states = []
+    for _ in range(count):
+        state = {
+            'Txn Calendar Year': list(rng.choice(years, rng.integers(1, len(years) + 1), replace=False)),
+            'Title Fiction Tag': ['Yes', 'No'] if rng.random() < 0.7 else ['Yes'],
+        }
+        for column, values in choices.items():
+            if rng.random() < 0.4:
+                state[column] = list(rng.choice(values, rng.integers(1, min(len(values), 10) + 1), replace=False))
+        if rng.random() < 0.5:
+            start, end = np.sort(rng.choice(dates, 2))
+            state['Title Publication Date'] = (str(start)[:10], str(end)[:10])
+        states.append(state)
+    return states
+
+
+def isin_filter(data, state):
+    """
+    The copy-and-isin filter chain update_charts used before the bitmap indexes.
+    """
+    filtered = data.copy()
+    for column, selected_values in state.items():
+        if column == 'Title Publication Date':
+            start, end = map(pd.to_datetime, selected_values)
+            filtered = filtered[filtered[column] >= start]
+            filtered = filtered[filtered[column] <= end]
+        elif selected_values:
+            filtered = filtered[filtered[column].isin(selected_values)]
+    return filtered
+
+
+def isin_request(data, state):
+    """
+    The legacy filter chain plus the two full scans for the publication date KPIs.
+    """
+    filtered = isin_filter(data, state)
+    return filtered, filtered['Title Publication Date'].min(), filtered['Title Publication Date'].max()
+
+
+def index_request(index, date_index, state):
+    """
+    Bitmap and date index selection plus the publication date KPIs from the date index.
+    """
+    selections = dict(state)
+    date_range = selections.pop('Title Publication Date', (None, None))
+    date_bits = date_index.range_bits(*date_range)
+    bits = index.select(selections, [date_bits] if date_bits is not None else [])
+    rows = None if bits is None else index.rows(bits)
+    return rows, *date_index.bounds(rows)
+
+
+def bench_filter(args):
+    """
+    Compares bitmap and date index lookups with the copy-and-isin filter chain and min/max scans.
+    """
+    data = synthetic_dataset(args.rows) if args.rows else data_loader.load_dataset()
+    columns = ['Txn Calendar Year', 'Subject', 'Item Media', 'Title Author', 'Title Publisher', 'Title Fiction Tag']
+    index, build_time = timed(FilterIndex, data, columns)
+    index_bytes = sum(
+        column_index.row_ids.nbytes + column_index.offsets.nbytes
+        + sum(bitset.nbytes for bitset in column_index.bitsets.values())
+        for column_index in index.indexes.values()
+    )
+    print(f"Rows: {len(data):,}   index build {build_time * 1000:.1f} ms   index size {index_bytes / 2**20:.1f} MiB")
+
+    date_index = DateIndex(data['Title Publication Date'])
+    states = filter_states(data, args.states)
+    for state in states:
+        rows, earliest, latest = index_request(index, date_index, state)
+        expected, expected_earliest, expected_latest = isin_request(data, state)
+        assert np.array_equal(data.index if rows is None else data.index[rows], expected.index)
+        assert (earliest, latest) == (expected_earliest, expected_latest) or expected.empty
+
+    isin_time = min(timed(lambda: [isin_request(data, state) for state in states])[1] for _ in range(args.repeat))
+    index_time = min(timed(lambda: [index_request(index, date_index, state) for state in states])[1]
+                     for _ in range(args.repeat))
+    print(f"copy + isin chain  {isin_time / len(states) * 1000:8.3f} ms per request")
+    print(f"index selection    {index_time / len(states) * 1000:8.3f} ms per request "
+          f"({isin_time / index_time:.1f}x faster)")
+
+
+def baseline_value_counts(series):
+    """
+    The baseline's value_counts() call, on the column as the baseline read it: plain strings rather than categoricals.
+    """
+    return series.astype(object).value_counts()
+
+
+def per_chart_counts(filtered_data, count_values):
+    """
+    The counts the Overview chart builders computed separately before overview_aggregates, kept for comparison.
+    """
+    df = filtered_data.copy()
+    df['Category'] = df['Title Fiction Tag'].map({'Yes': 'Fiction', 'No': 'Non-Fiction'}).astype(str)
+    return {
+        'media': count_values(filtered_data['Item Media']),
+        'category': count_values(filtered_data['Title Fiction Tag']),
+        'publishers': count_values(filtered_data['Title Publisher']),
+        'authors': count_values(filtered_data['Title Author']),
+        'treemap': filtered_data.groupby(['Title Publisher', 'Title Author'], observed=True).size().reset_index(name='Count'),
+        'publication_years': df.groupby(['Publication Year', 'Category'], observed=True).size().reset_index(name='Count'),
+        'transaction_years': filtered_data.groupby(['Txn Calendar Year', 'Item Media'],
+                                                   observed=True).size().reset_index(name='Count'),
+    }
+
+
+def same_table(left, right):
+    """
+    Returns whether two count tables hold the same groups and counts in the same order.
+    """
+    if isinstance(left, pd.Series):
+        left, right = left.reset_index(), right.reset_index()
+    return left.shape == right.shape and all(
+        left[a].astype(str).tolist() == right[b].astype(str).tolist() for a, b in zip(left.columns, right.columns))
+
+
+def bench_aggregation(args):
+    """
+    Compares the single-pass Overview aggregation with the per-chart value_counts/groupby calls.
+
+    The per-chart counts rank values with the baseline's value_counts() on
+    string columns, so the check covers the order of ties as well.
+    """
+    data = synthetic_dataset(args.rows) if args.rows else data_loader.load_dataset()
+    for label, selection in [('all rows', data), ('two years', data[data['Txn Calendar Year'].isin([2020, 2021])])]:
+        separate, separate_time = min((timed(per_chart_counts, selection, baseline_value_counts) for _ in range(args.repeat)),
+                                      key=lambda run: run[1])
+        combined, combined_time = min((timed(overview_aggregates, selection) for _ in range(args.repeat)),
+                                      key=lambda run: run[1])
+        mismatched = [name for name in separate if not same_table(separate[name], combined[name])]
+        if mismatched:
+            raise SystemExit(f"Aggregates differ from the per-chart counts: {', '.join(mismatched)}")
+        print(f"{label:<10} {len(selection):>10,} rows   per-chart {separate_time * 1000:8.2f} ms"
+              f"   single pass {combined_time * 1000:8.2f} ms   ({separate_time / combined_time:4.1f}x)")
+
+
+def cube_states(data, count, seed=0):
+    """
+    Draws random filter selections over the cube dimensions only.
+    """
+    rng = np.random.default_rng(seed)
+    choices = {
+        'Txn Calendar Year': sorted(int(year) for year in data['Txn Calendar Year'].unique()),
+        'Item Media': list(data['Item Media'].cat.categories),
+        'Title Fiction Tag': list(data['Title Fiction Tag'].cat.categories),
+        'Subject': list(data['Subject'].cat.categories),
+    }
+    return [
+        {column: list(rng.choice(values, rng.integers(1, min(len(values), 3) + 1), replace=False))
+         if rng.random() < 0.5 else [] for column, values in choices.items()}
+        for _ in range(count)
+    ]
+
+
+def row_path(data, index, date_index, state):
+    """
+    Overview tables and KPI values of a filter state from the selected rows.
+    """
+    bits = index.select(state)
+    rows = None if bits is None else index.rows(bits)
+    filtered = data if rows is None else data.iloc[rows]
+    kpis = tuple(filtered[column].nunique() for column in ('Title Native Name', 'Title Author', 'Title Publisher'))
+    return overview_aggregates(filtered), kpis + date_index.bounds(rows)
+
+
+def cube_path(cube, state):
+    """
+    Overview tables and KPI values of a filter state from the cube groups.
+    """
+    groups = cube.select(state)
+    kpis = tuple(cube.distinct(column, groups) for column in ('Title Native Name', 'Title Author', 'Title Publisher'))
+    return cube.overview_tables(groups), kpis + cube.bounds('Title Publication Date', groups)
+
+
+def bench_cube(args):
+    """
+    Compares answering the Overview charts and KPIs from the pre-aggregated cube with the row path.
+    """
+    data = synthetic_dataset(args.rows) if args.rows else data_loader.load_dataset()
+    cube, build_time = timed(AggregateCube, data, OVERVIEW_COLUMNS + ['Title Native Name'],
+                              ['Title Publication Date'])
+    print(f"Rows: {len(data):,}   cube build {build_time * 1000:.1f} ms   "
+          f"{len(cube):,} groups   {len(cube.cells):,} cells")
+
+    index = FilterIndex(data, CUBE_DIMENSIONS)
+    date_index = DateIndex(data['Title Publication Date'])
+    states = cube_states(data, args.states)
+    for state in states:
+        (row_tables, row_kpis), (cube_tables, cube_kpis) = row_path(data, index, date_index, state), cube_path(cube, state)
+        mismatched = [name for name in row_tables if not same_table(row_tables[name], cube_tables[name])]
+        if mismatched or [str(value) for value in row_kpis] != [str(value) for value in cube_kpis]:
+            raise SystemExit(f"Cube results differ from the row path for {state}: {', '.join(mismatched) or 'KPIs'}")
+
+    row_time = min(timed(lambda: [row_path(data, index, date_index, state) for state in states])[1]
+                   for _ in range(args.repeat))
+    cube_time = min(timed(lambda: [cube_path(cube, state) for state in states])[1] for _ in range(args.repeat))
+    print(f"row path   {row_time / len(states) * 1000:8.3f} ms per request")
+    print(f"cube path  {cube_time / len(states) * 1000:8.3f} ms per request ({row_time / cube_time:.1f}x faster)")
+
+
+def pandas_request(data, index, date_index, state):
+    """
+    Overview tables and KPI values of a filter state from the index selection and pandas/NumPy aggregation.
+    """
+    rows, earliest, latest = index_request(index, date_index, state)
+    filtered = data if rows is None else data.iloc[rows]
+    kpis = tuple(filtered[column].nunique() for column in ('Title Native Name', 'Title Author', 'Title Publisher'))
+    return overview_aggregates(filtered), kpis + (earliest, latest)
+
+
+def sql_request(backend, state):
+    """
+    Overview tables and KPI values of a filter state from SQL backend queries.
+    """
+    selections = dict(state)
+    date_range = selections.pop('Title Publication Date', (None, None))
+    return backend.overview_tables(selections, *date_range), backend.kpis(selections, *date_range)
+
+
+def bench_sql(args):
+    """
+    Compares the embedded SQL backends with the pandas path on random filter states.
+    """
+    data = synthetic_dataset(args.rows) if args.rows else data_loader.load_dataset()
+    index = FilterIndex(data, ['Txn Calendar Year', 'Subject', 'Item Media', 'Title Author', 'Title Publisher',
+                               'Title Fiction Tag'])
+    date_index = DateIndex(data['Title Publication Date'])
+    states = filter_states(data, args.states)
+    pandas_time = min(timed(lambda: [pandas_request(data, index, date_index, state) for state in states])[1]
+                      for _ in range(args.repeat))
+    print(f"Rows: {len(data):,}   {len(states)} filter states")
+    print(f"pandas   {'':>22} {pandas_time / len(states) * 1000:9.3f} ms per request")
+
+    for name in args.backend:
+        try:
+            backend, load_time = timed(open_backend, name, data)
+        except ImportError as exc:
+            print(f"{name:<8} skipped: {exc}")
+            continue
+        for state in states:
+            (expected_tables, expected_kpis) = pandas_request(data, index, date_index, state)
+            tables, kpis = sql_request(backend, state)
+            mismatched = [key for key in expected_tables if not same_table(expected_tables[key], tables[key])]
+            if mismatched or [str(value) for value in kpis] != [str(value) for value in expected_kpis]:
+                raise SystemExit(f"{name} results differ from pandas for {state}: {', '.join(mismatched) or 'KPIs'}")
+        sql_time = min(timed(lambda: [sql_request(backend, state) for state in states])[1] for _ in range(args.repeat))
+        print(f"{name:<8} load {load_time * 1000:9.1f} ms   {sql_time / len(states) * 1000:9.3f} ms per request "
+              f"({pandas_time / sql_time:.2f}x pandas)")
+
+
+def filter_walk(data, count, seed=0):
+    """
+    Draws a session's filter states, each changing one control of the previous one.
+
+    Authors, publishers and subjects are added or removed one at a time, and
+    years, fiction and the publication date range are switched occasionally.
+    """
+    rng = np.random.default_rng(seed)
+    years = sorted(int(year) for year in data['Txn Calendar Year'].unique())
+    choices = {column: list(data[column].cat.categories) for column in ('Title Author', 'Title Publisher', 'Subject')}
+    dates = [None] + sorted(str(date)[:10] for date in rng.choice(data['Title Publication Date'].dropna().to_numpy(), 4))
+    state = {'Txn Calendar Year': (), 'Subject': (), 'Item Media': (), 'Title Author': (), 'Title Publisher': (),
+             'Title Fiction Tag': (), DATE_DIMENSION: (None, None)}
+    states = []
+    for _ in range(count):
+        state = dict(state)
+        control = rng.choice(['Title Author', 'Title Author', 'Title Publisher', 'Subject', 'Txn Calendar Year',
+                              'Title Fiction Tag', DATE_DIMENSION])
+        if control in choices:
+            selected = list(state[control])
+            if selected and rng.random() < 0.4:
+                selected.pop(rng.integers(len(selected)))
+            else:
+                selected.append(choices[control][rng.integers(len(choices[control]))])
+            state[control] = tuple(sorted(set(selected)))
+        elif control == 'Txn Calendar Year':
+            state[control] = tuple(sorted(rng.choice(years, rng.integers(0, len(years)), replace=False).tolist()))
+        elif control == 'Title Fiction Tag':
+            state[control] = (('Yes',), ('No',), ())[rng.integers(3)]
+        else:
+            state[control] = (dates[rng.integers(len(dates))], None)
+        states.append(state)
+    return states
+
+
+def bench_incremental(args):
+    """
+    Compares the incremental filter engine with full recomputation along one session's filter changes.
+    """
+    data = synthetic_dataset(args.rows) if args.rows else data_loader.load_dataset()
+    index = FilterIndex(data, ['Txn Calendar Year', 'Subject', 'Item Media', 'Title Author', 'Title Publisher',
+                               'Title Fiction Tag'])
+    date_index = DateIndex(data['Title Publication Date'])
+    engine, build_time = timed(IncrementalFilter, data, index, date_index)
+    states = filter_walk(data, args.states)
+    keys = [tuple(sorted(state.items())) for state in states]
+    print(f"Rows: {len(data):,}   engine build {build_time * 1000:.1f} ms   {len(states)} filter changes")
+
+    def session(previous_states):
+        engine.states = LRUCache(len(states) + 1)
+        results = []
+        for key, previous, state in zip(keys, previous_states, states):
+            selection = engine.state(key, state, previous)
+            results.append((selection.mode, engine.overview_tables(selection), engine.kpis(selection)))
+        return results
+
+    def pandas_session():
+        results = []
+        for state in states:
+            selections = dict(state)
+            selections['Title Publication Date'] = selections.pop(DATE_DIMENSION)
+            results.append(pandas_request(data, index, date_index, selections))
+        return results
+
+    incremental, incremental_time = min((timed(session, [None] + keys[:-1]) for _ in range(args.repeat)),
+                                        key=lambda run: run[1])
+    full, full_time = min((timed(session, [None] * len(keys)) for _ in range(args.repeat)), key=lambda run: run[1])
+    expected, pandas_time = min((timed(pandas_session) for _ in range(args.repeat)), key=lambda run: run[1])
+    for (_, tables, kpis), (expected_tables, expected_kpis) in zip(incremental, expected):
+        mismatched = [key for key in expected_tables if not same_table(expected_tables[key], tables[key])]
+        if mismatched or [str(value) for value in kpis] != [str(value) for value in expected_kpis]:
+            raise SystemExit(f"Incremental results differ from pandas: {', '.join(mismatched) or 'KPIs'}")
+
+    patched = sum(mode == 'incremental' for mode, _, _ in incremental)
+    print(f"pandas path          {pandas_time / len(states) * 1000:8.3f} ms per change")
+    print(f"engine, full counts  {full_time / len(states) * 1000:8.3f} ms per change")
+    print(f"engine, incremental  {incremental_time / len(states) * 1000:8.3f} ms per change "
+          f"({patched} of {len(states)} patched, {full_time / incremental_time:.1f}x faster than full counts)")
+
+
+def generate_ranks_str(titles, ranks, max_display=10, max_title_length=55):
+    """
+    The per-author tooltip helper create_author_heatmap applied row by row before rank_tooltips, kept for comparison.
+    """
+    if not isinstance(titles, list) or not isinstance(ranks, list):
+        return "No rank data available."
+    num_pairs = min(len(titles), len(ranks), max_display)
+    rank_entries = []
+    for i in range(num_pairs):
+        title = titles[i] if pd.notnull(titles[i]) else "N/A"
+        rank = ranks[i] if pd.notnull(ranks[i]) else "N/A"
+        if len(title) > max_title_length:
+            title = title[:max_title_length-3] + "..."
+        rank_entries.append(f"{title}: {rank}")
+    if len(titles) > max_display or len(ranks) > max_display:
+        rank_entries.append("...")
+    return '<br>'.join(rank_entries)
+
+
+def legacy_tooltips(year_data):
+    """
+    Builds the heatmap tooltips with list aggregation and a row-wise apply, as before rank_tooltips.
+    """
+    year_data = year_data.astype({'Title Native Name': str})
+    pivot_table = year_data.groupby('Title Author', observed=True).agg(
+        Ranks=('Rank', list),
+        Titles=('Title Native Name', list)
+    ).reset_index()
+    tooltips = pivot_table.apply(lambda row: generate_ranks_str(row['Titles'], row['Ranks']), axis=1)
+    return pd.Series(tooltips.to_numpy(), index=pivot_table['Title Author'].astype(str))
+
+
+def batched_tooltips(year_data, tooltip_titles):
+    """
+    Builds the heatmap tooltips with rank_tooltips, as create_author_heatmap does.
+    """
+    authors = year_data['Title Author']
+    tooltips = rank_tooltips(
+        np.asarray(authors.array.codes),
+        tooltip_titles[year_data['Title Native Name'].array.codes],
+        format_ranks(year_data['Rank'])
+    )
+    return pd.Series(tooltips.to_numpy(), index=authors.cat.categories[tooltips.index].astype(str))
+
+
+def bench_tooltips(args):
+    """
+    Compares the batched heatmap tooltips with the row-wise generate_ranks_str helper.
+
+    The heatmap case builds the tooltips of the top 15 authors of every year;
+    the all-authors case builds them for every author of every year.
+    """
+    data = synthetic_dataset(args.rows) if args.rows else data_loader.load_dataset()
+    years = sorted(int(year) for year in data['Txn Calendar Year'].unique())
+    year_slices = [data[data['Txn Calendar Year'] == year] for year in years]
+    top_slices = [
+        year_data[year_data['Title Author'].isin(baseline_value_counts(year_data['Title Author']).nlargest(15).index)]
+        for year_data in year_slices
+    ]
+    tooltip_titles, truncate_time = timed(truncate_titles, data['Title Native Name'].cat.categories)
+    print(f"Rows: {len(data):,}   title truncation at startup {truncate_time * 1000:.1f} ms "
+          f"for {len(tooltip_titles) - 1:,} titles")
+
+    for label, slices in [(f'top 15 x {len(years)} years', top_slices), ('all authors', year_slices)]:
+        for year_data in slices:
+            expected = legacy_tooltips(year_data)
+            if not batched_tooltips(year_data, tooltip_titles).equals(expected):
+                raise SystemExit("Batched tooltips differ from generate_ranks_str")
+        authors = sum(year_data['Title Author'].nunique() for year_data in slices)
+        legacy_time = min(timed(lambda: [legacy_tooltips(year_data) for year_data in slices])[1]
+                          for _ in range(args.repeat))
+        batched_time = min(timed(lambda: [batched_tooltips(year_data, tooltip_titles) for year_data in slices])[1]
+                           for _ in range(args.repeat))
+        print(f"{label:<18} {authors:>8,} tooltips   row-wise {legacy_time * 1000:9.2f} ms"
+              f"   batched {batched_time * 1000:8.2f} ms   ({legacy_time / batched_time:5.1f}x)")
+
+
+def per_year_heatmap_tables(filtered_data, years, top_n_authors, tooltip_titles, count_values):
+    """
+    The per-year slicing create_author_heatmap did before heatmap_aggregates, kept for comparison.
+    """
+    tables = {}
+    for year in years:
+        year_data = filtered_data[filtered_data['Txn Calendar Year'] == year]
+        if year_data.empty:
+            continue
+        top_authors = count_values(year_data['Title Author']).nlargest(top_n_authors).index.tolist()
+        year_data = year_data[year_data['Title Author'].isin(top_authors)]
+        pivot_table = year_data.groupby('Title Author', observed=True).agg(
+            Average_Rank=('Rank', 'mean')
+        ).reset_index()
+        pivot_table_sorted = pivot_table.sort_values(by='Average_Rank')
+        tooltips = rank_tooltips(
+            np.asarray(year_data['Title Author'].array.codes),
+            tooltip_titles[year_data['Title Native Name'].array.codes],
+            format_ranks(year_data['Rank'])
+        )
+        pivot_table_sorted['Ranks_str'] = tooltips.loc[pivot_table_sorted['Title Author'].cat.codes].to_numpy()
+        tables[year] = pivot_table_sorted
+    return tables
+
+
+def grouped_heatmap_tables(filtered_data, top_n_authors, tooltip_titles):
+    """
+    The heatmap tables of every year from heatmap_aggregates(), sorted by average rank.
+    """
+    ranked_tables = heatmap_aggregates(filtered_data, top_n_authors, tooltip_titles)
+    return {year: top_authors_table(table, top_n_authors) for year, table in ranked_tables.items()
+            if table is not None}
+
+
+def same_heatmap_tables(left, right):
+    """
+    Returns whether two sets of per-year heatmap tables hold the same authors, ranks and hover text in order.
+    """
+    return left.keys() == right.keys() and all(
+        left[year]['Title Author'].astype(str).tolist() == right[year]['Title Author'].astype(str).tolist()
+        and np.allclose(left[year]['Average_Rank'].astype(float), right[year]['Average_Rank'].astype(float),
+                        equal_nan=True)
+        and left[year]['Ranks_str'].tolist() == right[year]['Ranks_str'].tolist()
+        for year in left)
+
+
+def bench_heatmaps(args):
+    """
+    Compares the single grouped pass for all year heatmaps with slicing and grouping each year separately.
+
+    Each year's top authors are picked with the baseline's value_counts() on
+    string columns, so the check covers the authors picked among ties.
+    """
+    data = synthetic_dataset(args.rows, years=args.years) if args.rows else data_loader.load_dataset()
+    years = sorted(int(year) for year in data['Txn Calendar Year'].unique())
+    tooltip_titles = truncate_titles(data['Title Native Name'].cat.categories)
+    print(f"Rows: {len(data):,}   years: {len(years)}")
+    for top_n_authors in (5, 10, 15):
+        per_year, per_year_time = min(
+            (timed(per_year_heatmap_tables, data, years, top_n_authors, tooltip_titles, baseline_value_counts)
+             for _ in range(args.repeat)), key=lambda run: run[1])
+        grouped, grouped_time = min(
+            (timed(grouped_heatmap_tables, data, top_n_authors, tooltip_titles) for _ in range(args.repeat)),
+            key=lambda run: run[1])
+        if not same_heatmap_tables(per_year, grouped):
+            raise SystemExit(f"Heatmap tables differ from the per-year computation for top {top_n_authors}")
+        print(f"top {top_n_authors:<3} per-year slicing {per_year_time * 1000:8.2f} ms"
+              f"   one grouped pass {grouped_time * 1000:8.2f} ms   ({per_year_time / grouped_time:4.1f}x)")
+
+
+def synthetic_titles(count, seed=0):
+    """
+    Builds count distinct title-like strings by combining words of the workbook's titles.
+
+    The vocabulary is grown with altered copies of the words (one letter
+    replaced), so that it scales with the catalog as real titles' does.
+    """
+    base = data_loader.load_dataset()
+    words = sorted({word for title in base['Title Native Name'].cat.categories for word in str(title).split()})
+    rng = np.random.default_rng(seed)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    variants = []
+    for word in rng.choice(words, max(count // 2, len(words))):
+        i = rng.integers(0, len(word))
+        variants.append(word[:i] + letters[rng.integers(0, 26)] + word[i + 1:])
+    words = words + variants
+    lengths = rng.integers(2, 7, count)
+    picks = rng.integers(0, len(words), lengths.sum())
+    titles = [' '.join(words[i] for i in chunk) for chunk in np.split(picks, np.cumsum(lengths)[:-1])]
+    return [f'{title} ({index})' for index, title in enumerate(titles)]
+
+
+def misspell(text, rng):
+    """
+    Returns text with one character dropped and two neighbouring characters swapped.
+    """
+    i = rng.integers(1, len(text) - 2)
+    text = text[:i] + text[i + 1:]
+    j = rng.integers(0, len(text) - 1)
+    return text[:j] + text[j + 1] + text[j] + text[j + 2:]
+
+
+def dropdown_visible(options, search_value):
+    """
+    Returns the options a Dash Dropdown shows for a search, as its client-side filter picks them.
+
+    Every whitespace-separated word typed, in lower case, must occur within a
+    word of the option's label or 'search' field.
+    """
+    def words(text):
+        return str(text or '').lower().split()
+
+    typed = words(search_value)
+    return [option for option in options
+            if all(any(word in option_word for option_word in words(option['label']) + words(option.get('search')))
+                   for word in typed)]
+
+
+def check_dropdown_search(queries, seed=0):
+    """
+    Checks that the dashboard's dropdowns still show the value a misspelled search found.
+
+    For random values of each searchable dropdown, the options search_options()
+    returns for a misspelling are passed through the Dropdown's client-side
+    filter, which must keep all of them.
+
+    Returns:
+    - dict: Share of misspellings whose value was among the shown options, by dropdown.
+    """
+    dashboard = load_dashboard()
+    rng = np.random.default_rng(seed)
+    found = {}
+    for dropdown_id, index in dashboard.search_indexes.items():
+        values = [value for value in index.values if len(value) > 5]
+        hits = 0
+        for value in (values[i] for i in rng.integers(0, len(values), queries)):
+            search_value = misspell(value, rng)
+            options = dashboard.search_options(dropdown_id, search_value, [])
+            if dropdown_visible(options, search_value) != options:
+                raise SystemExit(f"The {dropdown_id} dropdown hides options found for {search_value!r}")
+            hits += value in [option['value'] for option in options]
+        found[dropdown_id] = hits / queries
+    return found
+
+
+def check_search_index_reload():
+    """
+    Checks that loading a dataset with new values indexes only those values.
+
+    The indexes are first stored for the workbook without its latest year,
+    then updated from the whole workbook. The second load must index exactly
+    the values the latest year adds, answer searches as indexes built from
+    scratch do, and a third load must index nothing.
+
+    Returns:
+    - tuple: (values added by the second load, seconds it took, seconds of a full build)
+    """
+    data = data_loader.load_dataset()
+    earlier = data[data['Txn Calendar Year'] != data['Txn Calendar Year'].max()].copy()
+    for column in SEARCHED_COLUMNS:
+        earlier[column] = earlier[column].cat.remove_unused_categories()
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        path = os.path.join(cache_dir, 'search_index.pickle')
+        update_search_indexes(earlier, path)
+        (indexes, added), update_time = timed(update_search_indexes, data, path)
+        _, added_again = update_search_indexes(data, path)
+    new_values = {column: len(data[column].cat.categories) - len(earlier[column].cat.categories)
+                  for column in SEARCHED_COLUMNS}
+    if added != new_values or any(added_again.values()):
+        raise SystemExit(f"Search index reload indexed {added} then {added_again}, expected {new_values} then none")
+
+    rebuilt, build_time = timed(lambda: {column: SearchIndex(data[column].cat.categories) for column in SEARCHED_COLUMNS})
+    for column in SEARCHED_COLUMNS:
+        for value in data[column].cat.categories[::7]:
+            for query in (str(value)[:3], str(value)[1:-1]):
+                if indexes[column].matches(query) != rebuilt[column].matches(query):
+                    raise SystemExit(f"Reloaded {column} index answers {query!r} differently from a full build")
+    return sum(added.values()), update_time, build_time
+
+
+def bench_search(args):
+    """
+    Measures search index build time, incremental additions and lookup latency.
+
+    Lookups are prefixes, inner words and misspellings of random values; the
+    misspellings only match through the trigram index. Misspellings of the
+    dashboard's own values are then checked through its dropdowns; see
+    check_dropdown_search().
+    """
+    values = synthetic_titles(args.values)
+    index, build_time = timed(SearchIndex, values)
+    print(f"Values: {len(values):,}   full build {build_time * 1000:8.1f} ms")
+
+    # Adding 1% new values, as a new data drop would
+    extra = synthetic_titles(args.values // 100, seed=1)
+    added, add_time = timed(index.add, extra)
+    print(f"Incremental add of {added:,} values {add_time * 1000:8.1f} ms   "
+          f"(full rebuild {timed(SearchIndex, values + extra)[1] * 1000:.1f} ms)")
+
+    rng = np.random.default_rng(0)
+    samples = [values[i] for i in rng.integers(0, len(values), args.queries)]
+    queries = {
+        'prefix': [value[:4] for value in samples],
+        'inner word': [value.split()[-2] for value in samples],
+        'misspelled': [misspell(value.rsplit(' (', 1)[0], rng) for value in samples],
+    }
+    for label, texts in queries.items():
+        times = np.array([timed(index.search, text)[1] for text in texts]) * 1000
+        found = np.mean([sample in index.search(text) for sample, text in zip(samples, texts)])
+        print(f"{label:<11} p50 {np.percentile(times, 50):6.3f} ms   p99 {np.percentile(times, 99):6.3f} ms"
+              f"   sampled value among the results {found * 100:5.1f}%")
+
+    added, update_time, build_time = check_search_index_reload()
+    print(f"Dataset reload indexed only its {added} new values in {update_time * 1000:.1f} ms "
+          f"(full build {build_time * 1000:.1f} ms)")
+
+    for dropdown_id, share in check_dropdown_search(min(args.queries, 200)).items():
+        print(f"{dropdown_id:<18} misspelled value shown by the dropdown {share * 100:5.1f}%")
+
+
+def component_key(component_id):
+    """
+    Returns a hashable key for a component id, which may be a pattern-matching dict.
+
+    Dict ids are serialized the way Dash keys them in callback responses.
+    """
+    if isinstance(component_id, dict):
+        return json.dumps(component_id, sort_keys=True, separators=(',', ':'))
+    return component_id
+
+
+def wildcard_id(component_id):
+    """
+    Returns a pattern-matching id with an ALL wildcard as a dict, or None for any other id.
+    """
+    if isinstance(component_id, str) and component_id.startswith('{'):
+        component_id = json.loads(component_id)
+    if isinstance(component_id, dict) and ['ALL'] in component_id.values():
+        return component_id
+    return None
+
+
+def apply_patch(value, patch):
+    """
+    Applies the operations of a serialized Dash Patch to a property value, as the renderer does.
+    """
+    for operation in patch['operations']:
+        if operation['operation'] != 'Assign':
+            raise ValueError(f"Unsupported patch operation: {operation['operation']}")
+        *parents, last = operation['location']
+        target = value
+        for key in parents:
+            target = target[key]
+        target[last] = operation['params']['value']
+    return value
+
+
+def is_figure_store(component_key, prop):
+    """
+    Returns whether a component property holds a chart's figure, i.e. the data of a '<graph id>-figure' store.
+    """
+    return prop == 'data' and (component_key.endswith('-figure') or component_key.startswith('{"type":"author-heatmap-figure"'))
+
+
+class DashClient:
+    """
+    Minimal stand-in for the Dash renderer, driving callbacks through the Flask test client.
+
+    Keeps the current value of every component property, fires the callbacks
+    an interaction triggers (following chained callbacks) and records the server
+    time and response size of each request, keeping the response bodies.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.client = app.server.test_client()
+        self.props = {}
+        self.ids = []
+        self.bodies = []
+        started = time.perf_counter()
+        self.layout_bytes = self.client.get('/_dash-layout').data
+        self.layout_seconds = time.perf_counter() - started
+        self.collect_props(json.loads(self.layout_bytes))
+        # Clientside callbacks run in the browser, not on the server
+        self.callbacks = [callback for callback in app.callback_map.values() if 'callback' in callback]
+
+    def collect_props(self, component):
+        """
+        Records the properties of every component with an id in the serialized layout.
+        """
+        if isinstance(component, list):
+            for child in component:
+                self.collect_props(child)
+            return
+        if not isinstance(component, dict) or 'props' not in component:
+            return
+        props = component['props']
+        if 'id' in props:
+            self.ids.append(props['id'])
+            for prop, value in props.items():
+                self.props[(component_key(props['id']), prop)] = value
+        self.collect_props(props.get('children'))
+
+    def matching_ids(self, pattern):
+        """
+        Returns the ids in the layout matched by a pattern-matching id with ALL wildcards.
+        """
+        return [component_id for component_id in self.ids
+                if isinstance(component_id, dict) and component_id.keys() == pattern.keys()
+                and all(value == ['ALL'] or component_id[key] == value for key, value in pattern.items())]
+
+    def fire(self, callback, changed):
+        """
+        Posts one callback request and applies its response; returns (seconds, bytes, changed props).
+
+        Dependencies with ALL wildcards are expanded to the matching components, as the renderer does.
+        """
+        def describe(dependency):
+            pattern = wildcard_id(dependency['id'])
+            if pattern is not None:
+                return [describe({'id': component_id, 'property': dependency['property']})
+                        for component_id in self.matching_ids(pattern)]
+            return {'id': dependency['id'], 'property': dependency['property'],
+                    'value': self.props.get((component_key(dependency['id']), dependency['property']))}
+
+        def describe_output(output):
+            pattern = wildcard_id(output.component_id_str())
+            if pattern is not None:
+                return [{'id': component_id, 'property': output.component_property}
+                        for component_id in self.matching_ids(pattern)]
+            return {'id': output.component_id, 'property': output.component_property}
+
+        outputs = [describe_output(output)
+                   for output in (callback['output'] if isinstance(callback['output'], list) else [callback['output']])]
+        body = {
+            'output': callback['output_key'],
+            'outputs': outputs if isinstance(callback['output'], list) else outputs[0],
+            'inputs': [describe(dependency) for dependency in callback['inputs']],
+            'state': [describe(dependency) for dependency in callback['state']],
+            'changedPropIds': sorted(changed),
+        }
+        start = time.perf_counter()
+        response = self.client.post('/_dash-update-component', json=body)
+        elapsed = time.perf_counter() - start
+        self.bodies.append(response.data)
+        updated = set()
+        if response.status_code == 200:
+            for component_id, props in response.get_json()['response'].items():
+                for prop, value in props.items():
+                    if isinstance(value, dict) and '__dash_patch_update' in value:
+                        value = apply_patch(self.props[(component_id, prop)], value)
+                    self.props[(component_id, prop)] = value
+                    updated.add(f'{component_id}.{prop}')
+        return elapsed, len(response.data), updated
+
+    def forget_renders(self):
+        """
+        Clears the rendered-state stores, so the next requests re-render every chart.
+        """
+        for key in self.props:
+            if key[0].startswith('rendered-'):
+                self.props[key] = None
+
+    def interact(self, component_id, prop, value):
+        """
+        Sets a property as the user would and runs every callback it triggers.
+
+        Returns:
+        - list: (callback output, seconds, bytes) for each request made.
+        """
+        self.props[(component_key(component_id), prop)] = value
+        changed = {f'{component_key(component_id)}.{prop}'}
+        return self.run(changed)
+
+    def load(self):
+        """
+        Fires the callbacks the renderer calls on page load, those without
+        prevent_initial_call, then every callback they trigger.
+
+        Returns:
+        - list: (callback output, seconds, bytes, updated props) for each request made.
+        """
+        prevented = {dependency['output'] for dependency in self.client.get('/_dash-dependencies').get_json()
+                     if dependency.get('prevent_initial_call')}
+        requests, changed = [], set()
+        for callback in self.callbacks:
+            if callback['output_key'] not in prevented:
+                elapsed, size, updated = self.fire(callback, changed)
+                changed |= updated
+                requests.append((callback['output_key'], elapsed, size, updated))
+        pending = [callback for callback in self.callbacks if callback['output_key'] in prevented]
+        return requests + self.run(changed, pending=pending)
+
+    def run(self, changed, fire_all=False, pending=None):
+        """
+        Fires every callback whose inputs changed, until no callback is left to trigger.
+
+        Parameters:
+        - changed (set): 'id.prop' keys of the changed properties.
+        - fire_all (bool): Fire every callback once, whether or not its inputs changed.
+        - pending (list): Callbacks that may fire, all of them by default.
+
+        Returns:
+        - list: (callback output, seconds, bytes, updated props) for each request made.
+        """
+        requests = []
+        pending = list(self.callbacks if pending is None else pending)
+        while True:
+            ready = [callback for callback in pending
+                     if fire_all or any(f"{component_key(d['id'])}.{d['property']}" in changed
+                                        for d in callback['inputs'])]
+            if not ready:
+                return requests
+            callback = ready[0]
+            pending.remove(callback)
+            elapsed, size, updated = self.fire(callback, changed)
+            changed |= updated
+            requests.append((callback['output_key'], elapsed, size, updated))
+
+
+def load_dashboard():
+    """
+    Imports the app for the callback benchmarks and names each callback by its output key.
+
+    Unless NLB_INITIAL_FIGURES is set, the default figures are not embedded in
+    the layout, so that the first run of the callbacks does the full work.
+    """
+    os.environ.setdefault('NLB_INITIAL_FIGURES', '0')
+    import app as dashboard
+
+    for key, callback in dashboard.app.callback_map.items():
+        callback['output_key'] = key
+    return dashboard
+
+
+def bench_callbacks(args):
+    """
+    Measures server time and response bytes per interaction, against recomputing every output.
+
+    The figure cache, heatmap precomputation and lazy tab rendering are
+    disabled, and the rendered-state stores are cleared before each run, so
+    that every request does its full work; the monolithic baseline fires every
+    callback on each interaction, as the single update_charts callback did.
+    """
+    dashboard = load_dashboard()
+    dashboard.figure_cache.maxsize = 0
+    dashboard.PRECOMPUTE_HEATMAPS = False
+    dashboard.LAZY_TABS = False
+
+    client = DashClient(dashboard.app)
+    client.run(set(), fire_all=True)
+    years = dashboard.HEATMAP_YEARS
+    subjects = list(dashboard.data['Subject'].cat.categories)
+    titles = list(dashboard.data['Title Native Name'].cat.categories)
+    interactions = [
+        ('year-filter', 'value', years[:2]),
+        ('subject-filter', 'value', subjects[:1]),
+        ('top-authors-slider', 'value', 12),
+        ('title-filter', 'value', titles[:2]),
+    ]
+    def measure(interaction):
+        runs = []
+        for _ in range(args.repeat):
+            client.forget_renders()
+            runs.append(interaction())
+        return min(runs, key=lambda requests: sum(r[1] for r in requests))
+
+    for component_id, prop, value in interactions:
+        split = measure(lambda: client.interact(component_id, prop, value))
+        monolithic = measure(lambda: client.run(set(), fire_all=True))
+        split_time, split_bytes = sum(r[1] for r in split), sum(r[2] for r in split)
+        full_time, full_bytes = sum(r[1] for r in monolithic), sum(r[2] for r in monolithic)
+        print(f"{component_id:<20} {len(split)} callback(s) {split_time * 1000:8.1f} ms {split_bytes / 1024:8.1f} KiB"
+              f"   vs all outputs {full_time * 1000:8.1f} ms {full_bytes / 1024:8.1f} KiB"
+              f"   ({(1 - split_time / full_time) * 100:3.0f}% less work, "
+              f"{(1 - split_bytes / full_bytes) * 100:3.0f}% less payload)")
+
+
+def bench_patch(args):
+    """
+    Measures the bytes sent per interaction with and without patching unchanged figure structures.
+
+    Each mode replays the same session from a cold figure cache with every tab
+    rendered, and the figures the client ends up with must be the same.
+    """
+    dashboard = load_dashboard()
+    dashboard.PRECOMPUTE_HEATMAPS = False
+    dashboard.LAZY_TABS = False
+
+    years = dashboard.HEATMAP_YEARS
+    subjects = dashboard.data['Subject'].value_counts().index.tolist()
+    media = dashboard.data['Item Media'].value_counts().index.tolist()
+    titles = list(dashboard.data['Title Native Name'].cat.categories)
+    interactions = [
+        ('year-filter', 'value', years[:2]),
+        ('year-filter', 'value', years[:3]),
+        ('media-filter', 'value', media[:1]),
+        ('subject-filter', 'value', subjects[:1]),
+        ('subject-filter', 'value', subjects[:2]),
+        ('fiction-filter', 'value', ['Yes']),
+        ('top-authors-slider', 'value', 12),
+        ('title-filter', 'value', titles[:2]),
+        ('title-filter', 'value', titles[:3]),
+    ]
+
+    results = {}
+    for patched in (False, True):
+        dashboard.PATCH_FIGURES = patched
+        dashboard.figure_cache.entries.clear()
+        client = DashClient(dashboard.app)
+        client.run(set(), fire_all=True)
+        sizes = [sum(request[2] for request in client.interact(*interaction)) for interaction in interactions]
+        figures = {key: value for key, value in client.props.items() if is_figure_store(*key)}
+        results[patched] = sizes, figures
+
+    (full_sizes, full_figures), (patch_sizes, patch_figures) = results[False], results[True]
+    mismatched = [key for key in full_figures if json.dumps(full_figures[key], sort_keys=True, default=str)
+                  != json.dumps(patch_figures[key], sort_keys=True, default=str)]
+    if mismatched:
+        raise SystemExit(f"Patched figures differ from full figures: {mismatched}")
+    for (component_id, _, value), full_size, patch_size in zip(interactions, full_sizes, patch_sizes):
+        print(f"{component_id:<20} {str(value)[:28]:<30} full {full_size / 1024:8.1f} KiB"
+              f"   patched {patch_size / 1024:8.1f} KiB   ({(1 - patch_size / full_size) * 100:3.0f}% less)")
+    print(f"{'session':<51} full {sum(full_sizes) / 1024:8.1f} KiB   patched {sum(patch_sizes) / 1024:8.1f} KiB"
+          f"   ({(1 - sum(patch_sizes) / sum(full_sizes)) * 100:3.0f}% less)")
+
+
+def bench_templates(args):
+    """
+    Measures the bytes of the default view with and without figure templates shared through the layout.
+
+    Each mode loads the layout and fires every callback once for the default
+    filters, with every tab rendered, as a page load does.
+    """
+    dashboard = load_dashboard()
+    dashboard.PRECOMPUTE_HEATMAPS = False
+    dashboard.LAZY_TABS = False
+
+    results = {}
+    for shared in (False, True):
+        dashboard.SHARED_TEMPLATES = shared
+        dashboard.figure_cache.entries.clear()
+        dashboard.app.layout['figure-templates'].data = dashboard.FIGURE_TEMPLATES if shared else {}
+        client = DashClient(dashboard.app)
+        requests = client.run(set(), fire_all=True)
+        figures = {key: value for key, value in client.props.items() if is_figure_store(*key) and value}
+        results[shared] = len(client.layout_bytes), requests, figures
+
+    (full_layout, full_requests, full_figures), (shared_layout, shared_requests, shared_figures) = (
+        results[False], results[True])
+    for key, figure in shared_figures.items():
+        if figure.get('template') not in dashboard.FIGURE_TEMPLATES:
+            raise SystemExit(f"Figure still embeds its template: {key}")
+        merged = {'data': figure['data'], 'layout': {**figure['layout'],
+                                                      'template': dashboard.FIGURE_TEMPLATES[figure['template']]}}
+        if json.dumps(merged, sort_keys=True, default=str) != json.dumps(full_figures[key], sort_keys=True, default=str):
+            raise SystemExit(f"Figure differs once its template is merged back: {key}")
+
+    for (output, _, full_size, _), (_, _, shared_size, _) in zip(full_requests, shared_requests):
+        print(f"{output[:50]:<52} embedded {full_size / 1024:8.1f} KiB   shared {shared_size / 1024:8.1f} KiB")
+    full_total = sum(request[2] for request in full_requests)
+    shared_total = sum(request[2] for request in shared_requests)
+    print(f"{'callback responses':<52} embedded {full_total / 1024:8.1f} KiB   shared {shared_total / 1024:8.1f} KiB"
+          f"   ({(1 - shared_total / full_total) * 100:3.0f}% less)")
+    print(f"{'layout':<52} embedded {full_layout / 1024:8.1f} KiB   shared {shared_layout / 1024:8.1f} KiB")
+    full_total, shared_total = full_total + full_layout, shared_total + shared_layout
+    print(f"{'page load':<52} embedded {full_total / 1024:8.1f} KiB   shared {shared_total / 1024:8.1f} KiB"
+          f"   ({(1 - shared_total / full_total) * 100:3.0f}% less)")
+
+
+def same_figure_data(plain, compact, float_digits):
+    """
+    Returns whether a compacted figure holds the values of the plain one, up to float_digits decimals.
+    """
+    if isinstance(plain, dict) and 'bdata' in plain:
+        left, right = decode_array(plain).astype(np.float64), decode_array(compact).astype(np.float64)
+        tolerance = 0.5 * 10 ** -float_digits + 1e-6 * np.abs(left) if float_digits is not None else 0
+        return left.shape == right.shape and bool(np.all((np.abs(left - right) <= tolerance)
+                                                         | (np.isnan(left) & np.isnan(right))))
+    if isinstance(plain, dict):
+        return plain.keys() == compact.keys() and all(same_figure_data(plain[key], compact[key], float_digits)
+                                                      for key in plain)
+    if isinstance(plain, list):
+        return len(plain) == len(compact) and all(same_figure_data(left, right, float_digits)
+                                                  for left, right in zip(plain, compact))
+    return plain == compact
+
+
+def bench_serialization(args):
+    """
+    Measures serialization time and bytes per chart output with each JSON engine, with and without compact trace data.
+
+    The outputs are the figures every chart callback sends for the default
+    filters, with every tab rendered; compacted figures must hold the same
+    values up to the configured float rounding.
+    """
+    from plotly.io.json import to_json_plotly
+
+    dashboard = load_dashboard()
+    dashboard.PRECOMPUTE_HEATMAPS = False
+    dashboard.LAZY_TABS = False
+
+    outputs = {}
+    for compact in (False, True):
+        dashboard.COMPACT_FIGURES = compact
+        dashboard.figure_cache.entries.clear()
+        client = DashClient(dashboard.app)
+        client.run(set(), fire_all=True)
+        outputs[compact] = {key[0]: value for key, value in client.props.items() if is_figure_store(*key) and value}
+
+    for key, figure in outputs[True].items():
+        if not same_figure_data(outputs[False][key], figure, dashboard.FLOAT_DIGITS):
+            raise SystemExit(f"Compact figure holds different values: {key}")
+
+    engines = ['json', 'orjson']
+    totals = np.zeros((2, len(engines) + 1))
+    print(f"float digits {dashboard.FLOAT_DIGITS}; time per output (min of {args.repeat}) and bytes, "
+          f"as Plotly encodes it | compacted")
+    for key in outputs[False]:
+        row = []
+        for index, compact in enumerate((False, True)):
+            figure = outputs[compact][key]
+            times = [min(timed(to_json_plotly, figure, engine=engine)[1] for _ in range(args.repeat))
+                     for engine in engines]
+            size = len(to_json_plotly(figure).encode())
+            totals[index] += [*times, size]
+            row.append('  '.join(f"{engine} {seconds * 1000:6.3f} ms" for engine, seconds in zip(engines, times))
+                       + f"  {size / 1024:6.1f} KiB")
+        print(f"{key[:44]:<46} {row[0]}   |   {row[1]}")
+    print(f"{'total':<46} " + '   |   '.join(
+        '  '.join(f"{engine} {seconds * 1000:6.3f} ms" for engine, seconds in zip(engines, total[:-1]))
+        + f"  {total[-1] / 1024:6.1f} KiB" for total in totals))
+
+
+def bench_compression(args):
+    """
+    Measures CPU time against bytes saved per compression level, for the layout and the callback responses.
+
+    The bodies are those of a page load with the default filters and every
+    tab rendered; responses under the server's size threshold are left out,
+    as the server sends them uncompressed.
+    """
+    from compression import PRECOMPRESS_LEVELS, brotli
+
+    dashboard = load_dashboard()
+    dashboard.PRECOMPUTE_HEATMAPS = False
+    dashboard.LAZY_TABS = False
+
+    client = DashClient(dashboard.app)
+    client.run(set(), fire_all=True)
+    compressor = dashboard.response_compressor
+    responses = client.bodies
+    bodies = {
+        'layout': [client.layout_bytes],
+        'callback responses': [body for body in responses if len(body) >= compressor.min_size],
+    }
+    levels = [('gzip', level) for level in (1, 6, 9)]
+    if brotli is not None:
+        levels += [('br', quality) for quality in (1, 4, 9, 11)]
+    else:
+        print("brotli is not installed; measuring gzip only")
+
+    print(f"{len(responses) - len(bodies['callback responses'])} of {len(responses)} callback responses are under "
+          f"the {compressor.min_size} byte threshold; serving levels gzip {compressor.gzip_level}"
+          + (f", br {compressor.brotli_quality}" if brotli is not None else '')
+          + f"; precompressed at {', '.join(f'{name} {level}' for name, level in PRECOMPRESS_LEVELS.items())}")
+    for label, group in bodies.items():
+        size = sum(len(body) for body in group)
+        print(f"{label} ({len(group)} bodies, {size / 1024:.1f} KiB)")
+        for encoding, level in levels:
+            cpu, compressed = 0.0, 0
+            for body in group:
+                runs = []
+                for _ in range(args.repeat):
+                    started = time.thread_time()
+                    output = compressor.compress(body, encoding, level)
+                    runs.append(time.thread_time() - started)
+                cpu += min(runs)
+                compressed += len(output)
+            saved = size - compressed
+            print(f"  {encoding:<4} {level:>2}   {compressed / 1024:7.1f} KiB  ({saved / size * 100:4.1f}% saved)"
+                  f"   cpu {cpu * 1000:7.2f} ms   {cpu * 1000 / (saved / 2 ** 20):7.1f} ms per MiB saved")
+
+
+def measure_load(initial_figures, results):
+    """
+    Imports the app as a freshly booted worker and loads the page once, reporting startup and page load costs.
+    """
+    os.environ['NLB_INITIAL_FIGURES'] = '1' if initial_figures else '0'
+    os.environ['NLB_PRECOMPUTE_HEATMAPS'] = '0'
+    started = time.perf_counter()
+    dashboard = load_dashboard()
+    startup = time.perf_counter() - started
+
+    client = DashClient(dashboard.app)
+    requests = client.load()
+    figures = {key[0]: json.dumps(value, sort_keys=True, default=str)
+               for key, value in client.props.items() if is_figure_store(*key) and value}
+    results.put((startup, client.layout_seconds, len(client.layout_bytes),
+                 [(output, seconds, size) for output, seconds, size, _ in requests], figures))
+
+
+def bench_initial(args):
+    """
+    Compares a cold page load with the default figures embedded in the layout against rendering them from the initial callbacks.
+
+    Each mode runs in a new process, so that the figure cache starts empty as
+    after a deploy. The server's share of the time to interactive is the
+    layout request followed by the chain of initial callback requests; the
+    figures both clients end up with must be the same.
+    """
+    context = multiprocessing.get_context('spawn')
+    results = {}
+    for initial_figures in (False, True):
+        runs = []
+        for _ in range(args.repeat):
+            queue = context.Queue()
+            process = context.Process(target=measure_load, args=(initial_figures, queue))
+            process.start()
+            runs.append(queue.get())
+            process.join()
+        results[initial_figures] = min(runs, key=lambda run: run[1] + sum(request[1] for request in run[3]))
+
+    # Hidden tabs are not rendered by the initial callbacks in lazy mode, but are embedded
+    rendered, embedded = results[False][4], results[True][4]
+    if any(embedded.get(key) != figure for key, figure in rendered.items()):
+        raise SystemExit("Embedded initial figures differ from those of the initial callbacks")
+    for initial_figures, (startup, layout_seconds, layout_size, requests, _) in results.items():
+        load_seconds = layout_seconds + sum(request[1] for request in requests)
+        load_size = layout_size + sum(request[2] for request in requests)
+        print(f"{'embedded figures' if initial_figures else 'initial callbacks':<18} startup {startup:6.2f} s   "
+              f"page load {1 + len(requests):2d} round trip(s) {load_seconds * 1000:8.1f} ms {load_size / 1024:7.1f} KiB"
+              f"   (layout {layout_seconds * 1000:6.1f} ms {layout_size / 1024:6.1f} KiB)")
+        for output, seconds, size in requests:
+            print(f"  {output[:50]:<52} {seconds * 1000:8.1f} ms {size / 1024:7.1f} KiB")
+
+
+def bench_slider(args):
+    """
+    Measures server time per top-authors-slider move, with and without precomputed slider variants.
+
+    For each mode the figure cache starts empty, every chart is rendered for
+    the default filters, and the slider is then moved once to each other
+    value, so that every move is the first request for its value.
+    """
+    dashboard = load_dashboard()
+    dashboard.LAZY_TABS = False
+
+    for precompute in (False, True):
+        dashboard.PRECOMPUTE_HEATMAPS = precompute
+        dashboard.figure_cache.entries.clear()
+        dashboard.heatmap_variant_cache.entries.clear()
+        client = DashClient(dashboard.app)
+        client.run(set(), fire_all=True)
+        start_value = client.props[('top-authors-slider', 'value')]
+
+        # Wait for the background precomputation to finish
+        dashboard.heatmap_precompute.submit(lambda: None).result()
+        moves = [client.interact('top-authors-slider', 'value', value)
+                 for value in range(dashboard.MIN_TOP_AUTHORS, dashboard.MAX_TOP_AUTHORS + 1)
+                 if value != start_value]
+        times = [sum(request[1] for request in requests) for requests in moves]
+        print(f"{'precomputed' if precompute else 'on demand':<12} {len(moves)} slider moves   "
+              f"mean {sum(times) / len(times) * 1000:6.1f} ms   max {max(times) * 1000:6.1f} ms")
+
+
+TAB_FIGURES = {
+    'tab-overview': ('media-type-donut-figure', 'category-distribution-donut-figure', 'overdrive-distribution-figure',
+                     'top-publishers-bar-figure', 'top-authors-bar-figure', 'publication-year-stacked-bar-figure',
+                     'custom-chart-figure'),
+    'tab-detailed': ('{"type":"author-heatmap-figure"', 'rank-trend-line-figure'),
+}
+
+
+def time_to_first_chart(requests, tab_id):
+    """
+    Returns the server time spent until the first figure of a tab was updated, or None.
+    """
+    elapsed = 0.0
+    for _, seconds, _, updated in requests:
+        elapsed += seconds
+        if any(prop.endswith('.data') and prop.startswith(TAB_FIGURES[tab_id]) for prop in updated):
+            return elapsed
+    return None
+
+
+def bench_tabs(args):
+    """
+    Compares lazy and eager tab rendering over filter changes and tab switches.
+
+    Each round changes the year filter on the Overview tab, opens the Rank
+    Trend Analysis tab and returns to the Overview tab. The figure cache and
+    heatmap precomputation are disabled so that every render does its full work.
+    """
+    dashboard = load_dashboard()
+    dashboard.figure_cache.maxsize = 0
+    dashboard.PRECOMPUTE_HEATMAPS = False
+    years = dashboard.HEATMAP_YEARS
+    steps = [
+        ('filter change', 'year-filter', 'value', 'tab-overview'),
+        ('open Rank Trend', 'tabs', 'active_tab', 'tab-detailed'),
+        ('back to Overview', 'tabs', 'active_tab', 'tab-overview'),
+    ]
+
+    for lazy in (False, True):
+        dashboard.LAZY_TABS = lazy
+        dashboard.render_stats = dashboard.RenderStats()
+        client = DashClient(dashboard.app)
+        client.run(set(), fire_all=True)
+        totals = {label: [] for label, *_ in steps}
+        for round_index in range(args.repeat):
+            for label, component_id, prop, tab_id in steps:
+                value = years[:1 + round_index % 2] if component_id == 'year-filter' else tab_id
+                requests = client.interact(component_id, prop, value)
+                totals[label].append((sum(r[1] for r in requests), sum(r[2] for r in requests),
+                                      time_to_first_chart(requests, tab_id)))
+        print('lazy tabs' if lazy else 'eager tabs')
+        for label, runs in totals.items():
+            seconds, size, first = min(runs, key=lambda run: run[0])
+            first = f"{first * 1000:8.1f} ms" if first is not None else '  cached   '
+            print(f"  {label:<18} work {seconds * 1000:8.1f} ms  payload {size / 1024:8.1f} KiB"
+                  f"  time to first chart {first}")
+        for tab_id, counters in dashboard.render_stats.stats().items():
+            print(f"  {tab_id:<18} {counters['renders']} renders, {counters['deferred']} deferred,"
+                  f" {counters['reused']} reused, mean render {counters['mean_chart_ms']:.1f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5, help="Number of timed runs per measurement")
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+
+    fetch = subparsers.add_parser('fetch', help="Conditional workbook fetch against a local HTTP stand-in")
+    fetch.add_argument('--workbook', default=data_loader.BUNDLED_WORKBOOK)
+    fetch.set_defaults(func=bench_fetch)
+
+    memory = subparsers.add_parser('memory', help="Worker memory with a shared memory-mapped dataset")
+    memory.add_argument('--rows', type=int, default=0, help="Synthetic row count (0 uses the real workbook)")
+    memory.add_argument('--workers', type=int, default=4)
+    memory.set_defaults(func=bench_memory)
+
+    encoding = subparsers.add_parser('encoding', help="Categorical encoding against the legacy string frame")
+    encoding.add_argument('--rows', type=int, default=0, help="Resampled row count (0 uses the real workbook)")
+    encoding.set_defaults(func=bench_encoding)
+
+    filter_parser = subparsers.add_parser('filter', help="Bitmap index selection against the isin filter chain")
+    filter_parser.add_argument('--rows', type=int, default=0, help="Synthetic row count (0 uses the real workbook)")
+    filter_parser.add_argument('--states', type=int, default=50, help="Number of random filter states")
+    filter_parser.set_defaults(func=bench_filter)
+
+    aggregation = subparsers.add_parser('aggregation', help="Single-pass Overview aggregation against per-chart counts")
+    aggregation.add_argument('--rows', type=int, default=0, help="Synthetic row count (0 uses the real workbook)")
+    aggregation.set_defaults(func=bench_aggregation)
+
+    cube = subparsers.add_parser('cube', help="Overview charts and KPIs from the pre-aggregated cube against the rows")
+    cube.add_argument('--rows', type=int, default=0, help="Synthetic row count (0 uses the real workbook)")
+    cube.add_argument('--states', type=int, default=50, help="Number of random filter states")
+    cube.set_defaults(func=bench_cube)
+
+    sql = subparsers.add_parser('sql', help="Embedded SQL query backends against the pandas path")
+    sql.add_argument('--rows', type=int, default=0, help="Synthetic row count (0 uses the real workbook)")
+    sql.add_argument('--states', type=int, default=20, help="Number of random filter states")
+    sql.add_argument('--backend', nargs='+', default=['sqlite', 'duckdb'],
+                     choices=[name for name, backend in QUERY_BACKENDS.items() if backend])
+    sql.set_defaults(func=bench_sql)
+
+    incremental = subparsers.add_parser('incremental', help="Incremental filter engine against full recomputation")
+    incremental.add_argument('--rows', type=int, default=0, help="Synthetic row count (0 uses the real workbook)")
+    incremental.add_argument('--states', type=int, default=100, help="Number of filter changes in the session")
+    incremental.set_defaults(func=bench_incremental)
+
+    tooltips = subparsers.add_parser('tooltips', help="Batched heatmap tooltips against the row-wise helper")
+    tooltips.add_argument('--rows', type=int, default=0, help="Synthetic row count (0 uses the real workbook)")
+    tooltips.set_defaults(func=bench_tooltips)
+
+    heatmaps = subparsers.add_parser('heatmaps', help="One grouped pass for all year heatmaps against per-year slicing")
+    heatmaps.add_argument('--rows', type=int, default=0, help="Synthetic row count (0 uses the real workbook)")
+    heatmaps.add_argument('--years', type=int, default=4, help="Transaction years in the synthetic data")
+    heatmaps.set_defaults(func=bench_heatmaps)
+
+    search = subparsers.add_parser('search', help="Search index build, incremental additions and lookups")
+    search.add_argument('--values', type=int, default=100000, help="Number of synthetic titles")
+    search.add_argument('--queries', type=int, default=500, help="Number of lookups per query kind")
+    search.set_defaults(func=bench_search)
+
+    callbacks = subparsers.add_parser('callbacks', help="Server time and payload per interaction")
+    callbacks.set_defaults(func=bench_callbacks)
+
+    patch = subparsers.add_parser('patch', help="Bytes per interaction with and without figure patches")
+    patch.set_defaults(func=bench_patch)
+
+    templates = subparsers.add_parser('templates', help="Default view bytes with and without shared figure templates")
+    templates.set_defaults(func=bench_templates)
+
+    serialization = subparsers.add_parser('serialization', help="JSON engines and compact trace data per chart output")
+    serialization.set_defaults(func=bench_serialization)
+
+    compression = subparsers.add_parser('compression', help="Compression CPU time against bytes saved per level")
+    compression.set_defaults(func=bench_compression)
+
+    initial = subparsers.add_parser('initial', help="Cold page load with embedded default figures against initial callbacks")
+    initial.set_defaults(func=bench_initial)
+
+    slider = subparsers.add_parser('slider', help="Slider moves with and without precomputed heatmap variants")
+    slider.set_defaults(func=bench_slider)
+
+    tabs = subparsers.add_parser('tabs', help="Lazy against eager rendering of hidden tabs")
+    tabs.set_defaults(func=bench_tabs)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
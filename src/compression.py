@@ -0,0 +1,164 @@
+import gzip
+import threading
+import time
+
+from flask import request
+
+try:
+    import brotli
+except ImportError:  # Brotli is optional; responses are gzipped without it
+    brotli = None
+
+# Response types worth compressing: the layout and callback JSON, the index page and the component bundles
+COMPRESSIBLE_MIMETYPES = {
+    'application/json',
+    'application/javascript',
+    'text/javascript',
+    'text/html',
+    'text/css',
+    'text/plain',
+}
+
+# Levels of bodies compressed once and served many times; Brotli's highest
+# quality (11) takes seconds on the plotly.js bundle
+PRECOMPRESS_LEVELS = {'br': 9, 'gzip': 9}
+
+
+def accepted_encodings(header):
+    """
+    Returns the content codings an Accept-Encoding header allows, ignoring those with q=0.
+    """
+    accepted = set()
+    for part in header.split(','):
+        coding, _, parameters = part.strip().partition(';')
+        quality = parameters.strip()
+        if quality.startswith('q=') and quality[2:].strip('0.') == '':
+            continue
+        if coding:
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+class ResponseCompressor:
+    """
+    Brotli or gzip compression of the Flask server's responses above a size threshold.
+
+    Bodies registered with precompress() are compressed once at
+    PRECOMPRESS_LEVELS and served from memory whenever a response carries the
+    same bytes, e.g. the serialized layout, which only changes with the
+    dataset. Responses under static_prefixes, the versioned component bundles,
+    are registered on first use. Other responses are compressed on the fly at
+    the configured levels, and the CPU time spent per coding is counted
+    against the bytes saved.
+    """
+
+    def __init__(self, min_size=1024, gzip_level=6, brotli_quality=4, static_prefixes=()):
+        """
+        Parameters:
+        - min_size (int): Smallest body, in bytes, that is compressed.
+        - gzip_level (int): gzip level (1-9) of responses compressed on the fly.
+        - brotli_quality (int): Brotli quality (0-11) of responses compressed on the fly.
+        - static_prefixes (tuple): URL path prefixes whose bodies never change and are precompressed on first use.
+        """
+        self.min_size = min_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.static_prefixes = tuple(static_prefixes)
+        self.encodings = ['br', 'gzip'] if brotli is not None else ['gzip']
+        self.lock = threading.Lock()
+        self.precompressed = {}
+        self.counters = {encoding: {'responses': 0, 'precompressed': 0, 'bytes_in': 0, 'bytes_out': 0, 'cpu_ms': 0.0,
+                                    'precompress_cpu_ms': 0.0}
+                         for encoding in self.encodings}
+        self.skipped = 0
+
+    def init_app(self, server):
+        """
+        Compresses the responses of a Flask server from now on.
+        """
+        server.after_request(self.after_request)
+
+    def compress(self, body, encoding, level=None):
+        """
+        Returns body compressed with the given coding, at the configured level unless one is given.
+        """
+        if encoding == 'br':
+            return brotli.compress(body, quality=self.brotli_quality if level is None else level)
+        return gzip.compress(body, compresslevel=self.gzip_level if level is None else level, mtime=0)
+
+    def precompress(self, body):
+        """
+        Compresses a response body once per coding at PRECOMPRESS_LEVELS and keeps the results.
+
+        Returns:
+        - dict: Coding -> compressed body.
+        """
+        body = bytes(body)
+        with self.lock:
+            compressed = self.precompressed.get(body)
+        if compressed is not None:
+            return compressed
+        compressed, cpu_ms = {}, {}
+        for encoding in self.encodings:
+            started = time.thread_time()
+            compressed[encoding] = self.compress(body, encoding, PRECOMPRESS_LEVELS[encoding])
+            cpu_ms[encoding] = (time.thread_time() - started) * 1000
+        with self.lock:
+            self.precompressed[body] = compressed
+            for encoding, spent in cpu_ms.items():
+                self.counters[encoding]['precompress_cpu_ms'] += spent
+        return compressed
+
+    def after_request(self, response):
+        """
+        Compresses a response with the preferred coding the client accepts, if it is large enough.
+        """
+        response.vary.add('Accept-Encoding')
+        accepted = accepted_encodings(request.headers.get('Accept-Encoding', ''))
+        encoding = next((encoding for encoding in self.encodings if encoding in accepted), None)
+        if (encoding is None or response.status_code != 200 or response.direct_passthrough
+                or 'Content-Encoding' in response.headers or response.mimetype not in COMPRESSIBLE_MIMETYPES):
+            return response
+
+        body = response.get_data()
+        if len(body) < self.min_size:
+            with self.lock:
+                self.skipped += 1
+            return response
+
+        with self.lock:
+            precompressed = self.precompressed.get(body)
+        if precompressed is None and request.path.startswith(self.static_prefixes):
+            precompressed = self.precompress(body)
+        started = time.thread_time()
+        compressed = precompressed[encoding] if precompressed is not None else self.compress(body, encoding)
+        cpu_ms = (time.thread_time() - started) * 1000
+
+        with self.lock:
+            counters = self.counters[encoding]
+            counters['responses'] += 1
+            counters['precompressed'] += precompressed is not None
+            counters['bytes_in'] += len(body)
+            counters['bytes_out'] += len(compressed)
+            counters['cpu_ms'] += cpu_ms
+
+        response.set_data(compressed)
+        response.headers['Content-Encoding'] = encoding
+        return response
+
+    def stats(self):
+        """
+        Returns the counters per coding, with the share of bytes saved and the
+        CPU time spent per MiB saved while serving (precompression, paid once,
+        is counted apart), and the number of responses under the threshold.
+        """
+        with self.lock:
+            encodings = {}
+            for encoding, counters in self.counters.items():
+                saved = counters['bytes_in'] - counters['bytes_out']
+                encodings[encoding] = {
+                    **counters,
+                    'saved_ratio': saved / counters['bytes_in'] if counters['bytes_in'] else None,
+                    'cpu_ms_per_mib_saved': counters['cpu_ms'] / (saved / 2 ** 20) if saved > 0 else None,
+                }
+            return {'min_size': self.min_size, 'skipped': self.skipped, 'encodings': encodings}
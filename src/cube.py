@@ -0,0 +1,177 @@
+import numpy as np
+import pandas as pd
+
+from aggregation import column_codes, overview_tables
+
+# Dimensions of the cube; filters on any other column need the row-level path
+CUBE_DIMENSIONS = ['Txn Calendar Year', 'Item Media', 'Title Fiction Tag', 'Subject']
+
+
+def dimension_codes(column):
+    """
+    Returns the (codes, values) of any column: categorical and integer columns
+    through column_codes(), others (e.g. dates) factorized in sorted order.
+    """
+    if isinstance(column.dtype, pd.CategoricalDtype) or pd.api.types.is_integer_dtype(column.dtype):
+        return column_codes(column)
+    codes, values = pd.factorize(column, sort=True)
+    return codes.astype(np.int64), values
+
+
+def combine_codes(codes_list):
+    """
+    Combines per-column codes into one dense code per distinct combination.
+
+    The combined code is re-densified after each column, so it never grows
+    beyond the number of rows times the cardinality of one column.
+
+    Returns:
+    - tuple: (inverse, first) where inverse[i] is the combination of row i and
+      first[c] is the first row holding combination c.
+    """
+    key = np.zeros(len(codes_list[0]), dtype=np.int64)
+    for codes in codes_list:
+        key = key * (int(codes.max(initial=-1)) + 2) + (codes + 1)
+        _, key = np.unique(key, return_inverse=True)
+    _, first, inverse = np.unique(key, return_index=True, return_inverse=True)
+    return inverse.ravel(), first
+
+
+class AggregateCube:
+    """
+    Pre-aggregated row counts over year x media x fiction x subject.
+
+    The dataset is collapsed at load into groups of identical rows over the
+    cube dimensions and the detail columns the charts break down by, keeping
+    the smallest and largest value of the bound columns per group. Groups are
+    ordered by their first row, so that counts weighted by group size rank
+    values in the same order as counting the rows would, ties included.
+
+    The groups roll up into cells, one per combination of the dimensions that
+    occurs, holding counts and rank sums. A selection on the dimensions is
+    evaluated once per cell and expanded to the cell's groups, which replaces
+    the row selection and the row scans of any filter state it covers.
+    """
+
+    def __init__(self, data, detail_columns, bound_columns=(), rank_column='Rank'):
+        """
+        Parameters:
+        - data (DataFrame): The preprocessed dataset.
+        - detail_columns (list): Further columns kept per group, e.g. those the charts count by.
+        - bound_columns (list): Columns of which only the range per group is kept, e.g. dates.
+        - rank_column (str): Integer column whose sums and counts are kept per cell.
+        """
+        self.n_rows = len(data)
+        columns = CUBE_DIMENSIONS + [column for column in detail_columns if column not in CUBE_DIMENSIONS]
+        row_codes = {column: dimension_codes(data[column]) for column in columns}
+
+        # Groups in the order of their first row, and the group of each row
+        inverse, first = combine_codes([row_codes[column][0] for column in columns])
+        order = np.argsort(first, kind='stable')
+        position = np.empty(len(order), dtype=np.int64)
+        position[order] = np.arange(len(order))
+        row_groups = position[inverse]
+        first_rows = first[order]
+
+        self.values = {column: values for column, (_, values) in row_codes.items()}
+        self.codes = {column: codes[first_rows] for column, (codes, _) in row_codes.items()}
+        self.counts = np.bincount(row_groups, minlength=len(first_rows))
+
+        # Smallest and largest code of each bound column per group, -1 if none
+        self.bounds_codes = {}
+        for column in bound_columns:
+            codes, self.values[column] = dimension_codes(data[column])
+            valid = codes >= 0
+            low = np.full(len(first_rows), np.iinfo(np.int64).max)
+            high = np.full(len(first_rows), -1)
+            np.minimum.at(low, row_groups[valid], codes[valid])
+            np.maximum.at(high, row_groups[valid], codes[valid])
+            self.bounds_codes[column] = (np.where(high >= 0, low, -1), high)
+
+        # Cells of the dimensions, with their measures rolled up from the rows
+        self.group_cells, cell_first = combine_codes([self.codes[column] for column in CUBE_DIMENSIONS])
+        self.cell_codes = {column: self.codes[column][cell_first] for column in CUBE_DIMENSIONS}
+        rank = data[rank_column]
+        ranked = ~rank.isna().to_numpy()
+        row_cells = self.group_cells[row_groups]
+        n_cells = len(cell_first)
+        self.cells = pd.DataFrame({
+            **{column: self.values[column].take(self.cell_codes[column], allow_fill=True) for column in CUBE_DIMENSIONS},
+            'Count': np.bincount(row_cells, minlength=n_cells),
+            'Rank Sum': np.bincount(row_cells[ranked], weights=rank.to_numpy(dtype=np.int64, na_value=0)[ranked],
+                                    minlength=n_cells).astype(np.int64),
+            'Ranked': np.bincount(row_cells[ranked], minlength=n_cells),
+        })
+
+        # Rollups of every single dimension, computed once at load
+        self.rollups = {column: self.rollup([column]) for column in CUBE_DIMENSIONS}
+
+    def __len__(self):
+        return len(self.counts)
+
+    def rollup(self, dimensions):
+        """
+        Sums the cell measures over all but the given dimensions.
+
+        Returns:
+        - DataFrame: Count, Rank Sum, Ranked and Average Rank per combination of the dimensions.
+        """
+        table = self.cells.groupby(dimensions, observed=True, sort=True)[['Count', 'Rank Sum', 'Ranked']].sum()
+        table['Average Rank'] = table['Rank Sum'] / table['Ranked'].replace(0, np.nan)
+        return table.reset_index()
+
+    def covers(self, selections):
+        """
+        Returns whether a filter on the given columns can be answered from the cube.
+
+        Parameters:
+        - selections (dict): Column name -> selected values; empty selections apply no filter.
+        """
+        return all(column in CUBE_DIMENSIONS for column, selected in selections.items() if selected)
+
+    def select(self, selections):
+        """
+        Returns the groups matching a selection on the cube dimensions.
+
+        Parameters:
+        - selections (dict): Dimension -> list of selected values. Empty selections
+          leave the dimension unrestricted, as in FilterIndex.select().
+
+        Returns:
+        - ndarray: Boolean mask over the groups.
+        """
+        cells = np.ones(len(self.cells), dtype=bool)
+        for column, selected_values in selections.items():
+            if not selected_values:
+                continue
+            codes = self.values[column].get_indexer(pd.Index(selected_values))
+            cells &= np.isin(self.cell_codes[column], codes[codes >= 0])
+        return cells[self.group_cells]
+
+    def overview_tables(self, groups):
+        """
+        Returns the Overview count tables of the selected groups, as aggregation.overview_aggregates().
+        """
+        return overview_tables(
+            {column: (self.codes[column][groups], self.values[column]) for column in self.codes},
+            self.counts[groups],
+        )
+
+    def distinct(self, column, groups):
+        """
+        Returns the number of distinct non-missing values of a column in the selected groups.
+        """
+        codes = self.codes[column][groups]
+        return int(np.count_nonzero(np.bincount(codes[codes >= 0], minlength=len(self.values[column]))))
+
+    def bounds(self, column, groups):
+        """
+        Returns the smallest and largest value of a bound column in the selected
+        groups, or (NaT, NaT) if none has a value.
+        """
+        low, high = (codes[groups] for codes in self.bounds_codes[column])
+        low = low[low >= 0]
+        if not len(low):
+            return pd.NaT, pd.NaT
+        values = self.values[column]
+        return values[low.min()], values[high.max()]
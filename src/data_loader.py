@@ -0,0 +1,400 @@
+import hashlib
+import json
+import logging
+import os
+import time
+import urllib.error
+import urllib.request
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+
+logger = logging.getLogger(__name__)
+
+# Bump this whenever preprocess() changes so stale snapshots are rebuilt
+SNAPSHOT_VERSION = '2'
+
+# Remote workbook published with the repository
+WORKBOOK_URL = os.environ.get(
+    'NLB_WORKBOOK_URL',
+    "https://github.com/clarence-ck/NLB_Top100/raw/refs/heads/main/Top_100_OD_Titles_CY2020_to_2023.xlsx",
+)
+
+# Directory holding the local snapshot of the preprocessed dataset
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CACHE_DIR = os.environ.get('NLB_CACHE_DIR', os.path.join(BASE_DIR, '.cache'))
+
+# Copy of the workbook shipped with the repository, used when the remote is unreachable
+BUNDLED_WORKBOOK = os.path.join(BASE_DIR, 'Top_100_OD_Titles_CY2020_to_2023.xlsx')
+
+# A snapshot whose workbook was confirmed against the remote less than this many
+# seconds ago is used without contacting the remote again, so restarts do not
+# wait on the network; set NLB_REFRESH_SECONDS=0 to check on every start
+REFRESH_SECONDS = float(os.environ.get('NLB_REFRESH_SECONDS', 3600))
+
+SNAPSHOT_FILE = 'dataset.arrow'
+WORKBOOK_FILE = 'workbook.xlsx'
+FETCH_STATE_FILE = 'workbook.json'
+# Environment variable through which the gunicorn master hands the path of the
+# snapshot it published to the workers it forks
+PUBLISHED_SNAPSHOT_ENV = 'NLB_PUBLISHED_SNAPSHOT'
+SOURCE_HASH_KEY = b'nlb.source_sha256'
+VERSION_KEY = b'nlb.snapshot_version'
+
+# String columns stored as categoricals: int codes plus one dictionary of distinct values
+CATEGORY_COLUMNS = [
+    'Title Native Name',
+    'Title Author',
+    'Title Publisher',
+    'Subject',
+    'Title Fiction Tag',
+    'Item Media',
+]
+
+# Integer columns stored as nullable 16-bit integers
+SMALL_INT_COLUMNS = ['Txn Calendar Year', 'Rank', 'Publication Year']
+
+# Workbook columns the dashboard never reads
+UNUSED_COLUMNS = ['Title ISBN', 'Title BID']
+
+# Local copy of the workbook as returned by fetch_workbook()
+FetchResult = namedtuple('FetchResult', ['path', 'sha256', 'status'])
+
+
+def preprocess(data):
+    """
+    Applies the dashboard's preprocessing to the raw workbook contents.
+
+    String columns are encoded as categoricals, so filters and counts work on
+    small integer codes instead of hashing strings, and the year and rank
+    columns use nullable 16-bit integers. Columns the dashboard never reads
+    are dropped.
+
+    Parameters:
+    - data (DataFrame): The raw 'Sheet1' contents of the workbook.
+
+    Returns:
+    - DataFrame: The preprocessed dataset.
+    """
+    data = data.drop(columns=UNUSED_COLUMNS, errors='ignore')
+    data['Title Publication Date'] = pd.to_datetime(data['Title Publication Date'], errors='coerce')
+    data['Publication Year'] = data['Title Publication Date'].dt.year
+    data['Item Media'] = data['Item Media'].str.title()
+    for column in CATEGORY_COLUMNS:
+        data[column] = data[column].astype(str).astype('category')
+    for column in SMALL_INT_COLUMNS:
+        data[column] = data[column].astype('Int16')
+    return data
+
+
+def is_remote(source):
+    """
+    Returns True if the workbook source is an HTTP(S) URL rather than a local path.
+    """
+    return source.startswith(('http://', 'https://'))
+
+
+def file_sha256(path):
+    """
+    Returns the hex SHA-256 digest of a file's contents.
+    """
+    with open(path, 'rb') as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def read_fetch_state(cache_dir):
+    """
+    Returns the validators and hash recorded for the cached workbook copy, or {} if there is none.
+    """
+    try:
+        with open(os.path.join(cache_dir, FETCH_STATE_FILE)) as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not os.path.exists(os.path.join(cache_dir, WORKBOOK_FILE)):
+        return {}
+    return state
+
+
+def write_fetch_state(cache_dir, content, state):
+    """
+    Stores a freshly downloaded workbook and its validators, replacing the previous copy atomically.
+    """
+    os.makedirs(cache_dir, exist_ok=True)
+    for name, payload, mode in (
+        (WORKBOOK_FILE, content, 'wb'),
+        (FETCH_STATE_FILE, json.dumps(state), 'w'),
+    ):
+        path = os.path.join(cache_dir, name)
+        tmp_path = f'{path}.{os.getpid()}.tmp'
+        with open(tmp_path, mode) as f:
+            f.write(payload)
+        os.replace(tmp_path, path)
+
+
+def fetch_workbook(source, cache_dir=CACHE_DIR, timeout=10):
+    """
+    Returns a local copy of the workbook, downloading it only when the remote changed.
+
+    Remote sources are requested with If-None-Match / If-Modified-Since built from
+    the validators of the last successful download. A 304 response reuses the
+    cached copy without transferring the body. When the remote cannot be reached
+    the last good copy is used, and failing that the workbook bundled with the
+    repository.
+
+    Parameters:
+    - source (str): URL or filesystem path of the workbook.
+    - cache_dir (str): Directory holding the cached copy and its validators.
+    - timeout (int): Network timeout in seconds.
+
+    Returns:
+    - FetchResult: Path and SHA-256 of the workbook, and how it was obtained
+      ('local', 'downloaded', 'not-modified', 'stale' or 'bundled').
+    """
+    if not is_remote(source):
+        return FetchResult(source, file_sha256(source), 'local')
+
+    state = read_fetch_state(cache_dir)
+    if state.get('url') != source:
+        state = {}
+    cached_path = os.path.join(cache_dir, WORKBOOK_FILE)
+    request = urllib.request.Request(source)
+    if state.get('etag'):
+        request.add_header('If-None-Match', state['etag'])
+    if state.get('last_modified'):
+        request.add_header('If-Modified-Since', state['last_modified'])
+
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            content = response.read()
+            headers = response.headers
+    except urllib.error.HTTPError as exc:
+        if exc.code == 304 and state:
+            return FetchResult(cached_path, state['sha256'], 'not-modified')
+        logger.warning("Could not fetch workbook from %s: %s", source, exc)
+        return fallback_workbook(cache_dir, state)
+    except OSError as exc:
+        logger.warning("Could not fetch workbook from %s: %s", source, exc)
+        return fallback_workbook(cache_dir, state)
+
+    sha256 = hashlib.sha256(content).hexdigest()
+    new_state = {
+        'url': source,
+        'etag': headers.get('ETag'),
+        'last_modified': headers.get('Last-Modified'),
+        'sha256': sha256,
+    }
+    try:
+        write_fetch_state(cache_dir, content, new_state)
+    except OSError as exc:
+        logger.warning("Could not cache workbook in %s: %s", cache_dir, exc)
+        return fallback_workbook(cache_dir, state)
+    return FetchResult(cached_path, sha256, 'downloaded')
+
+
+def fallback_workbook(cache_dir, state):
+    """
+    Returns the last good workbook copy, or the bundled workbook if none was cached.
+    """
+    if state:
+        return FetchResult(os.path.join(cache_dir, WORKBOOK_FILE), state['sha256'], 'stale')
+    return FetchResult(BUNDLED_WORKBOOK, file_sha256(BUNDLED_WORKBOOK), 'bundled')
+
+
+def read_snapshot_metadata(path):
+    """
+    Returns the schema metadata of a snapshot file, or None if it is missing or unreadable.
+    """
+    try:
+        with pa.memory_map(path, 'r') as source:
+            return pa.ipc.open_file(source).schema.metadata or {}
+    except (OSError, pa.ArrowInvalid):
+        return None
+
+
+def write_snapshot(data, path, source_hash):
+    """
+    Writes the preprocessed dataset to an uncompressed Arrow IPC file.
+
+    Every column is written as a single contiguous chunk so that it can be
+    mapped back without concatenation. The file is written next to its
+    destination and moved into place so that concurrently starting workers
+    never read a partially written snapshot.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    table = pa.Table.from_pandas(data, preserve_index=False)
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}),
+        SOURCE_HASH_KEY: source_hash.encode(),
+        VERSION_KEY: SNAPSHOT_VERSION.encode(),
+    })
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    feather.write_feather(table, tmp_path, compression='uncompressed', chunksize=max(len(data), 1))
+    os.replace(tmp_path, path)
+
+
+def attach_column(array, pandas_type):
+    """
+    Wraps a single-chunk Arrow array as a pandas array, reusing its buffers where possible.
+
+    Parameters:
+    - array (Array): Column of the mapped snapshot.
+    - pandas_type (str): The column's 'numpy_type' from the snapshot's pandas metadata.
+
+    Returns:
+    - ExtensionArray or ndarray: The column's values.
+    """
+    if array.null_count == 0:
+        if pa.types.is_dictionary(array.type):
+            return pd.Categorical.from_codes(
+                array.indices.to_numpy(),
+                categories=array.dictionary.to_pandas(),
+                validate=False,
+            )
+        if pandas_type in ('Int8', 'Int16', 'Int32', 'Int64'):
+            return pd.arrays.IntegerArray(array.to_numpy(), np.zeros(len(array), dtype=bool))
+        if pa.types.is_integer(array.type) or pa.types.is_floating(array.type):
+            return array.to_numpy()
+    return array.to_pandas().array
+
+
+def attach_dataset(path):
+    """
+    Maps a snapshot file into memory and wraps its columns without copying them.
+
+    Numeric columns become read-only NumPy views and categorical columns keep
+    their codes in the mapped buffers, with only the small dictionaries copied.
+    Every gunicorn worker attaching the same file therefore shares its pages
+    through the OS page cache, and the dataset costs memory once regardless of
+    the number of workers.
+
+    Parameters:
+    - path (str): Path of a snapshot written by write_snapshot().
+
+    Returns:
+    - DataFrame: The preprocessed dataset backed by the mapped file, with
+      attrs['fingerprint'] identifying the workbook and snapshot version.
+    """
+    table = feather.read_table(path, memory_map=True)
+    pandas_types = {
+        column['name']: column['numpy_type']
+        for column in (table.schema.pandas_metadata or {}).get('columns', [])
+    }
+    columns = {}
+    for name, column in zip(table.column_names, table.columns):
+        array = column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+        columns[name] = attach_column(array, pandas_types.get(name))
+    data = pd.DataFrame(columns, copy=False)
+
+    metadata = table.schema.metadata or {}
+    if SOURCE_HASH_KEY in metadata:
+        data.attrs['fingerprint'] = '%s-%s' % (
+            metadata[SOURCE_HASH_KEY].decode(), metadata.get(VERSION_KEY, b'').decode())
+    return data
+
+
+def snapshot_is_fresh(path, metadata, source, cache_dir, max_age):
+    """
+    Returns True if a snapshot was built from the cached copy of a remote workbook confirmed within max_age seconds.
+
+    publish_dataset() bumps a snapshot's modification time whenever the remote
+    confirms its workbook and backdates snapshots built from a stale or bundled
+    copy after a failed request, so those are never considered fresh.
+    """
+    if not is_remote(source) or metadata is None or max_age <= 0:
+        return False
+    state = read_fetch_state(cache_dir)
+    try:
+        age = time.time() - os.path.getmtime(path)
+    except OSError:
+        return False
+    return (state.get('url') == source
+            and metadata.get(VERSION_KEY) == SNAPSHOT_VERSION.encode()
+            and metadata.get(SOURCE_HASH_KEY) == state.get('sha256', '').encode()
+            and 0 <= age < max_age)
+
+
+def publish_dataset(source=WORKBOOK_URL, cache_dir=CACHE_DIR, sheet_name='Sheet1', max_age=REFRESH_SECONDS):
+    """
+    Makes sure the snapshot in cache_dir matches the current workbook, rebuilding it if needed.
+
+    Run this once before workers start (see gunicorn.conf.py) so that they all
+    attach the same file instead of each fetching and parsing the workbook.
+    The remote is not contacted at all while the snapshot is fresh, see
+    snapshot_is_fresh().
+
+    Parameters:
+    - source (str): URL or filesystem path of the workbook.
+    - cache_dir (str): Directory where the snapshot is kept.
+    - sheet_name (str): Worksheet holding the data.
+    - max_age (float): Seconds for which a remote workbook's confirmation is trusted.
+
+    Returns:
+    - str: Path of the current snapshot.
+
+    Raises:
+    - OSError: If the snapshot had to be rebuilt and could not be written.
+    """
+    start = time.perf_counter()
+    snapshot_path = os.path.join(cache_dir, SNAPSHOT_FILE)
+    metadata = read_snapshot_metadata(snapshot_path)
+    if snapshot_is_fresh(snapshot_path, metadata, source, cache_dir, max_age):
+        logger.info("Snapshot %s was confirmed less than %ds ago, checked in %.3fs",
+                    snapshot_path, max_age, time.perf_counter() - start)
+        return snapshot_path
+    workbook = fetch_workbook(source, cache_dir)
+    confirmed = workbook.status in ('downloaded', 'not-modified')
+
+    if (metadata is not None
+            and metadata.get(VERSION_KEY) == SNAPSHOT_VERSION.encode()
+            and metadata.get(SOURCE_HASH_KEY) == workbook.sha256.encode()):
+        if confirmed:
+            os.utime(snapshot_path)
+        logger.info("Snapshot %s is current (workbook %s), checked in %.3fs",
+                    snapshot_path, workbook.status, time.perf_counter() - start)
+        return snapshot_path
+
+    data = preprocess(pd.read_excel(workbook.path, sheet_name=sheet_name))
+    write_snapshot(data, snapshot_path, workbook.sha256)
+    if not confirmed:
+        os.utime(snapshot_path, (0, 0))
+    logger.info("Parsed workbook (%s) and rebuilt snapshot in %.3fs",
+                workbook.status, time.perf_counter() - start)
+    return snapshot_path
+
+
+def load_dataset(source=WORKBOOK_URL, cache_dir=CACHE_DIR, sheet_name='Sheet1'):
+    """
+    Loads the preprocessed dataset, parsing the workbook only when its content changed.
+
+    In a gunicorn worker the snapshot published by the master process, named
+    by the NLB_PUBLISHED_SNAPSHOT environment variable, is attached as is,
+    without fetching the workbook again. Otherwise the workbook is obtained through fetch_workbook() and its hash compared with
+    the hash recorded in the local snapshot. On a match the snapshot is attached
+    directly; otherwise the workbook is parsed, preprocessed and written back as
+    the new snapshot. Startup therefore works without network access as long as
+    a previous copy or the bundled workbook is available. If the snapshot cannot
+    be written the dataset is kept in process memory instead.
+
+    Parameters:
+    - source (str): URL or filesystem path of the workbook.
+    - cache_dir (str): Directory where the snapshot is kept.
+    - sheet_name (str): Worksheet holding the data.
+
+    Returns:
+    - DataFrame: The preprocessed dataset.
+    """
+    published = os.environ.get(PUBLISHED_SNAPSHOT_ENV)
+    if published and read_snapshot_metadata(published) is not None:
+        return attach_dataset(published)
+    try:
+        return attach_dataset(publish_dataset(source, cache_dir, sheet_name))
+    except OSError as exc:
+        logger.warning("Could not publish snapshot in %s: %s", cache_dir, exc)
+        workbook = fetch_workbook(source, cache_dir)
+        data = preprocess(pd.read_excel(workbook.path, sheet_name=sheet_name))
+        data.attrs['fingerprint'] = '%s-%s' % (workbook.sha256, SNAPSHOT_VERSION)
+        return data
@@ -0,0 +1,91 @@
+import base64
+
+import numpy as np
+
+# Integer types of Plotly typed arrays, smallest first; Plotly.js has no 64-bit integer arrays
+INTEGER_DTYPES = [np.int8, np.uint8, np.int16, np.uint16, np.int32, np.uint32]
+
+
+def decode_array(spec):
+    """
+    Returns the values of a Plotly typed array spec, a dict with 'dtype', 'bdata' and an optional 'shape'.
+    """
+    values = np.frombuffer(base64.b64decode(spec['bdata']), dtype=np.dtype(spec['dtype']).newbyteorder('<'))
+    if 'shape' in spec:
+        values = values.reshape([int(size) for size in str(spec['shape']).split(',')])
+    return values
+
+
+def encode_array(values, shape=None):
+    """
+    Returns a Plotly typed array spec of an array, as Figure.to_plotly_json() creates them.
+    """
+    values = np.ascontiguousarray(values)
+    dtype = values.dtype.newbyteorder('<')
+    spec = {'dtype': dtype.str[1:], 'bdata': base64.b64encode(values.astype(dtype, copy=False).tobytes()).decode('ascii')}
+    if shape is not None:
+        spec['shape'] = shape
+    return spec
+
+
+def compact_array(values, float_digits=None):
+    """
+    Converts an array to the smallest typed array dtype that holds its values.
+
+    Floats are rounded to float_digits decimals if given. Whole floats become
+    integers, and rounded floats become 32-bit floats when those round back to
+    the same decimals.
+
+    Parameters:
+    - values (ndarray): Numeric trace data.
+    - float_digits (int or None): Decimals kept of float values; None keeps full precision.
+
+    Returns:
+    - ndarray: The values in their compact dtype.
+    """
+    if values.dtype.kind == 'f':
+        if float_digits is not None:
+            values = np.round(values, float_digits)
+        if values.size and np.isfinite(values).all() and (values == np.round(values)).all():
+            values = values.astype(np.int64)
+        elif float_digits is not None:
+            single = values.astype(np.float32)
+            if np.array_equal(np.round(single.astype(np.float64), float_digits), values, equal_nan=True):
+                return single
+            return values
+    if values.dtype.kind in 'iu' and values.size:
+        low, high = values.min(), values.max()
+        for dtype in INTEGER_DTYPES:
+            info = np.iinfo(dtype)
+            if info.min <= low and high <= info.max:
+                return values.astype(dtype)
+    return values
+
+
+def compact_figure(figure, float_digits=None):
+    """
+    Re-encodes the typed arrays of a serialized figure's traces in their smallest dtype.
+
+    Plotly sends numeric trace data as base64 typed arrays in the dtype of the
+    source column, e.g. float64 counts out of a treemap; whole values are
+    narrowed to the smallest integer type, and other floats are rounded to
+    float_digits decimals and narrowed to float32 where that keeps them.
+
+    Parameters:
+    - figure (dict): A figure from Figure.to_plotly_json().
+    - float_digits (int or None): Decimals kept of float trace data; None keeps full precision.
+
+    Returns:
+    - dict: The figure with compacted trace data.
+    """
+    def compact(value):
+        if isinstance(value, dict):
+            if 'bdata' in value and 'dtype' in value:
+                values = decode_array(value)
+                return encode_array(compact_array(values.ravel(), float_digits), value.get('shape'))
+            return {key: compact(item) for key, item in value.items()}
+        if isinstance(value, list):
+            return [compact(item) for item in value]
+        return value
+
+    return {**figure, 'data': compact(figure.get('data', []))}
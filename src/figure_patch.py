@@ -0,0 +1,104 @@
+import numpy as np
+from dash import Patch, no_update
+
+
+def is_data_array(value):
+    """
+    Returns whether a figure property holds an array of values, e.g. x, y, z, values or text.
+
+    Numeric arrays may already be encoded as Plotly typed arrays, dicts with a
+    base64 'bdata' buffer.
+    """
+    return isinstance(value, (list, tuple, np.ndarray)) or (isinstance(value, dict) and 'bdata' in value)
+
+
+def is_object_list(value):
+    """
+    Returns whether a figure property is a list of objects, like the traces or the layout annotations.
+    """
+    return isinstance(value, (list, tuple)) and len(value) > 0 and all(isinstance(item, dict) for item in value)
+
+
+def same_array(left, right):
+    """
+    Returns whether two data arrays hold the same values, NaN included.
+    """
+    if isinstance(left, dict) or isinstance(right, dict):
+        return left == right
+    if len(left) != len(right):
+        return False
+    try:
+        return bool(np.array_equal(np.asarray(left), np.asarray(right), equal_nan=True))
+    except TypeError:
+        return list(left) == list(right)
+
+
+def changed_values(old, new, location=()):
+    """
+    Lists the values that differ between two figures of the same structure.
+
+    Figures have the same structure when they hold the same properties and the
+    same number of traces and other objects, so that one is turned into the
+    other by replacing data arrays and single values.
+
+    Returns:
+    - list or None: (location, value) pairs, or None if the structure differs.
+    """
+    if is_object_list(old) or is_object_list(new):
+        if not (is_object_list(old) and is_object_list(new)) or len(old) != len(new):
+            return None
+        changes = []
+        for index, (old_item, new_item) in enumerate(zip(old, new)):
+            item_changes = changed_values(old_item, new_item, location + (index,))
+            if item_changes is None:
+                return None
+            changes.extend(item_changes)
+        return changes
+    if is_data_array(old) or is_data_array(new):
+        if is_data_array(old) and is_data_array(new) and same_array(old, new):
+            return []
+        return [(location, new)]
+    if isinstance(old, dict) and isinstance(new, dict):
+        if old.keys() != new.keys():
+            return None
+        changes = []
+        for key in new:
+            key_changes = changed_values(old[key], new[key], location + (key,))
+            if key_changes is None:
+                return None
+            changes.extend(key_changes)
+        return changes
+    if isinstance(old, dict) or isinstance(new, dict):
+        return None
+    return [] if old == new else [(location, new)]
+
+
+def figure_update(previous, figure):
+    """
+    Returns the update that turns a rendered figure into a new one.
+
+    When both figures have the same structure, only the data arrays and
+    values that changed are sent, as a Dash Patch, and identical figures are
+    not sent at all. Otherwise, or when the rendered figure is unknown, the
+    full figure is sent.
+
+    Parameters:
+    - previous (dict or None): The figure the browser shows, as plain JSON-compatible dicts.
+    - figure (dict): The new figure, in the same form.
+
+    Returns:
+    - Patch, dict or no_update: The value for the figure property.
+    """
+    changes = changed_values(previous, figure) if previous is not None else None
+    if changes is None:
+        return figure
+    if not changes:
+        return no_update
+
+    patch = Patch()
+    for location, value in changes:
+        target = patch
+        for key in location[:-1]:
+            target = target[key]
+        target[location[-1]] = value
+    return patch
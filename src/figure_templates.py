@@ -0,0 +1,56 @@
+import plotly.io as pio
+
+# Clientside function that puts a figure's shared template back in place before
+# it is drawn; figures without a template reference are passed through
+APPLY_TEMPLATE = """
+function (figure, templates) {
+    if (!figure) {
+        return window.dash_clientside.no_update;
+    }
+    if (typeof figure.template !== 'string' || !templates || !(figure.template in templates)) {
+        return {data: figure.data, layout: figure.layout};
+    }
+    return {
+        data: figure.data,
+        layout: Object.assign({}, figure.layout, {template: templates[figure.template]})
+    };
+}
+"""
+
+
+def template_definitions(names):
+    """
+    Returns the named Plotly templates as plain dicts, as they are embedded in serialized figures.
+
+    Parameters:
+    - names (list): Names registered in plotly.io.templates, e.g. 'plotly' or 'plotly_white'.
+
+    Returns:
+    - dict: Template name -> template JSON.
+    """
+    return {name: pio.templates[name].to_plotly_json() for name in names}
+
+
+def strip_template(figure, templates):
+    """
+    Replaces the template embedded in a serialized figure by the name of the shared definition it equals.
+
+    Every figure otherwise carries a full copy of its template in its layout,
+    several kilobytes that are the same for all charts. The shared definitions
+    are sent once per page load and merged back in the browser by APPLY_TEMPLATE.
+
+    Parameters:
+    - figure (dict): A figure from Figure.to_plotly_json().
+    - templates (dict): Shared definitions from template_definitions().
+
+    Returns:
+    - dict: The figure with layout.template replaced by a 'template' name, or
+      the figure unchanged if its template is not a shared one.
+    """
+    layout = figure.get('layout', {})
+    template = layout.get('template')
+    name = next((name for name, definition in templates.items() if definition == template), None)
+    if name is None:
+        return figure
+    layout = {key: value for key, value in layout.items() if key != 'template'}
+    return {**figure, 'layout': layout, 'template': name}
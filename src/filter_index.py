@@ -0,0 +1,193 @@
+import numpy as np
+import pandas as pd
+
+# Values holding fewer than 1/DENSE_RATIO of the rows keep a sorted array of row ids
+# instead of a full bitset, which bounds the index size for high-cardinality columns
+DENSE_RATIO = 32
+
+
+class BitmapIndex:
+    """
+    Precomputed row sets for every distinct value of one column.
+
+    Row sets are packed little-endian bitsets (one bit per row, eight rows per
+    byte). Frequent values store their bitset directly; rare values store their
+    sorted row ids and are scattered into a bitset on lookup.
+    """
+
+    def __init__(self, column):
+        """
+        Parameters:
+        - column (Series): A categorical or integer column of the dataset.
+        """
+        if isinstance(column.dtype, pd.CategoricalDtype):
+            self.values = column.cat.categories
+            codes = np.asarray(column.array.codes)
+        else:
+            codes, self.values = pd.factorize(column, sort=True)
+
+        self.n_rows = len(codes)
+        self.n_bytes = (self.n_rows + 7) // 8
+        id_dtype = np.int32 if self.n_rows < 2**31 else np.int64
+
+        # Row ids grouped by value: the rows of code c are row_ids[offsets[c]:offsets[c + 1]]
+        counts = np.bincount(codes[codes >= 0], minlength=len(self.values))
+        order = np.argsort(codes, kind='stable').astype(id_dtype)
+        self.row_ids = order[np.count_nonzero(codes < 0):]
+        self.offsets = np.concatenate(([0], np.cumsum(counts)))
+
+        self.bitsets = {
+            code: np.packbits(codes == code, bitorder='little')
+            for code in np.flatnonzero(counts * DENSE_RATIO >= self.n_rows)
+        }
+
+    def lookup(self, selected_values):
+        """
+        Returns the bitset of rows holding any of the selected values.
+
+        Parameters:
+        - selected_values (list): Values to match; values not in the column are ignored.
+
+        Returns:
+        - ndarray: A new packed bitset of dtype uint8.
+        """
+        codes = np.unique(self.values.get_indexer(pd.Index(selected_values)))
+        codes = codes[codes >= 0]
+
+        bits = np.zeros(self.n_bytes, dtype=np.uint8)
+        sparse = []
+        for code in codes:
+            bitset = self.bitsets.get(code)
+            if bitset is not None:
+                np.bitwise_or(bits, bitset, out=bits)
+            else:
+                sparse.append(self.row_ids[self.offsets[code]:self.offsets[code + 1]])
+
+        if sparse:
+            ids = np.concatenate(sparse)
+            np.bitwise_or.at(bits, ids >> 3, np.left_shift(1, ids & 7).astype(np.uint8))
+        return bits
+
+
+class FilterIndex:
+    """
+    Bitmap indexes over the dashboard's filter columns.
+
+    A filter combination is answered by OR-ing the bitsets of the selected
+    values within each column and AND-ing the results across columns.
+    """
+
+    def __init__(self, data, columns):
+        """
+        Parameters:
+        - data (DataFrame): The preprocessed dataset.
+        - columns (list): Names of the columns to index.
+        """
+        self.n_rows = len(data)
+        self.indexes = {column: BitmapIndex(data[column]) for column in columns}
+
+    def select(self, selections, masks=()):
+        """
+        Combines the selected values of every filter into a single row set.
+
+        Parameters:
+        - selections (dict): Column name -> list of selected values. Empty or
+          missing selections leave the column unrestricted.
+        - masks (iterable): Additional packed bitsets to AND in (e.g. a date range).
+
+        Returns:
+        - ndarray or None: The packed bitset of matching rows, or None if no filter applies.
+        """
+        bits = None
+        for column, selected_values in selections.items():
+            if not selected_values:
+                continue
+            column_bits = self.indexes[column].lookup(selected_values)
+            bits = column_bits if bits is None else np.bitwise_and(bits, column_bits, out=bits)
+        for mask in masks:
+            bits = mask.copy() if bits is None else np.bitwise_and(bits, mask, out=bits)
+        return bits
+
+    def rows(self, bits):
+        """
+        Returns the ascending row positions set in a packed bitset.
+        """
+        return np.flatnonzero(np.unpackbits(bits, count=self.n_rows, bitorder='little'))
+
+
+class DateIndex:
+    """
+    Rows of a datetime column ordered by date, for range filters and min/max lookups.
+
+    The dataset keeps its own row order; the index holds the permutation that
+    sorts it by date, so a date range is resolved with two binary searches and
+    the earliest/latest date of any row selection is read off the rows' sorted
+    positions instead of comparing dates.
+    """
+
+    def __init__(self, column):
+        """
+        Parameters:
+        - column (Series): A datetime column of the dataset; missing dates never match a range.
+        """
+        values = column.to_numpy()
+        self.n_rows = len(values)
+        valid_rows = np.flatnonzero(~np.isnat(values))
+        order = np.argsort(values[valid_rows], kind='stable')
+
+        # sorted_rows[i] is the row holding the i-th smallest date, and position[row] is
+        # the inverse mapping (-1 for rows without a date)
+        self.sorted_rows = valid_rows[order]
+        self.sorted_dates = pd.DatetimeIndex(values[self.sorted_rows])
+        self.position = np.full(self.n_rows, -1, dtype=np.int64)
+        self.position[self.sorted_rows] = np.arange(len(self.sorted_rows))
+
+    def range_bits(self, start_date=None, end_date=None):
+        """
+        Returns the bitset of rows dated within [start_date, end_date].
+
+        Parameters:
+        - start_date (str or None): Inclusive lower bound; falsy values leave it open.
+        - end_date (str or None): Inclusive upper bound; falsy values leave it open.
+
+        Returns:
+        - ndarray or None: A packed bitset, or None if the range excludes no row
+          (e.g. the default full publication range).
+        """
+        if not start_date and not end_date:
+            return None
+        low = self.sorted_dates.searchsorted(pd.to_datetime(start_date), side='left') if start_date else 0
+        high = (self.sorted_dates.searchsorted(pd.to_datetime(end_date), side='right')
+                if end_date else len(self.sorted_rows))
+        if low == 0 and high == self.n_rows:
+            return None
+        mask = np.zeros(self.n_rows, dtype=bool)
+        mask[self.sorted_rows[low:high]] = True
+        return pack_mask(mask)
+
+    def bounds(self, rows=None):
+        """
+        Returns the earliest and latest dates among the given rows.
+
+        Parameters:
+        - rows (ndarray or None): Row positions of the selection, or None for all rows.
+
+        Returns:
+        - tuple: (earliest, latest) as Timestamps, NaT when the selection has no dates.
+        """
+        if rows is None:
+            if len(self.sorted_dates) == 0:
+                return pd.NaT, pd.NaT
+            return self.sorted_dates[0], self.sorted_dates[-1]
+        positions = self.position[rows]
+        positions = positions[positions >= 0]
+        if len(positions) == 0:
+            return pd.NaT, pd.NaT
+        return self.sorted_dates[positions.min()], self.sorted_dates[positions.max()]
+
+
+def pack_mask(mask):
+    """
+    Packs a boolean row mask into the bitset layout used by FilterIndex.
+    """
+    return np.packbits(np.asarray(mask, dtype=bool), bitorder='little')
@@ -0,0 +1,45 @@
+"""
+Gunicorn configuration, loaded with -c src/gunicorn.conf.py in render.yaml.
+
+Gunicorn reads this file before applying --chdir, so the app's modules are
+imported inside the hooks, once src is on the import path.
+"""
+import os
+
+
+def on_starting(server):
+    """
+    Publishes the dataset snapshot and its search indexes once in the master process.
+
+    Workers then only memory-map the finished file (see data_loader.attach_dataset)
+    and read the indexes, instead of each fetching and parsing the workbook
+    and indexing its values.
+    """
+    import data_loader
+    import search_index
+
+    try:
+        snapshot_path = data_loader.publish_dataset()
+    except OSError as exc:
+        server.log.warning("Could not publish dataset snapshot: %s", exc)
+        return
+    os.environ[data_loader.PUBLISHED_SNAPSHOT_ENV] = snapshot_path
+    _, added = search_index.update_search_indexes(
+        data_loader.attach_dataset(snapshot_path),
+        os.path.join(os.path.dirname(snapshot_path), search_index.SEARCH_INDEX_FILE))
+    server.log.info("Indexed %d new search values", sum(added.values()))
+
+
+def post_worker_init(worker):
+    """
+    Warms up the caches of a booted worker before it accepts requests, when NLB_WARMUP is 'worker'.
+
+    The worker heartbeats after every callback, so the arbiter does not time it out.
+    """
+    import app
+
+    if app.WARMUP != 'worker':
+        return
+    timings = app.warm_up(on_progress=lambda label, seconds: worker.notify())
+    worker.log.info("Warm-up rendered %d filter states in %.2f s, skipped %d", len(timings) - 2, timings['total'],
+                    sum(timings['skipped'].values()))
@@ -0,0 +1,233 @@
+import numpy as np
+import pandas as pd
+
+from aggregation import (GROUPED_TABLES, OVERVIEW_COLUMNS, RANKED_TABLES, category_codes, first_positions,
+                         ranked_table)
+from cube import dimension_codes
+from query_cache import LRUCache
+
+# Columns whose value counts are kept per selection, for the Overview tables and the KPIs
+COUNTED_COLUMNS = OVERVIEW_COLUMNS + ['Title Native Name', 'Title Publication Date']
+
+# Dimension of the publication date range in a selection
+DATE_DIMENSION = 'Title Publication Date'
+
+
+class SelectionState:
+    """
+    A filter selection with the per-dimension row sets it was built from and
+    the value counts of its rows.
+
+    Attributes:
+    - selections (dict): Dimension -> selected values, or (start, end) for the date range.
+    - masks (dict): Dimension -> packed bitset of the rows it lets through, None if unrestricted.
+    - bits (ndarray or None): The combined bitset, None if no dimension restricts the rows.
+    - counts (dict): Counted column or grouped table key -> count per code.
+    - first_seen (dict): Ranked column -> first selected row per code.
+    - mode (str): 'incremental' if patched from a previous state, 'full' if counted from scratch.
+    """
+
+    def __init__(self, selections, masks, bits, counts, first_seen, mode):
+        self.selections = selections
+        self.masks = masks
+        self.bits = bits
+        self.counts = counts
+        self.first_seen = first_seen
+        self.mode = mode
+
+
+class IncrementalFilter:
+    """
+    Filter engine that derives each selection from the previous one of the same session.
+
+    A session's previous selection is looked up in a bounded cache of recent
+    states. When exactly one dimension changed, only that dimension's row set
+    is looked up again; the rows entering and leaving the selection are the
+    difference of the old and new combined bitsets, and the value counts are
+    patched by adding the counts of the entering rows and subtracting those of
+    the leaving ones. Any other change, an evicted previous state, or a
+    difference larger than the new selection is counted from scratch.
+    """
+
+    def __init__(self, data, filter_index, date_index, maxsize=32):
+        """
+        Parameters:
+        - data (DataFrame): The preprocessed dataset.
+        - filter_index (FilterIndex): Bitmap indexes over the filter columns, including the ranked columns.
+        - date_index (DateIndex): Index of the publication dates.
+        - maxsize (int): Number of recent selection states kept.
+        """
+        self.n_rows = len(data)
+        self.filter_index = filter_index
+        self.date_index = date_index
+        self.states = LRUCache(maxsize)
+        self.all_rows = np.packbits(np.ones(self.n_rows, dtype=bool), bitorder='little')
+
+        # Row codes of the counted columns, the category labels and every grouped pair
+        self.codes, self.values, self.sizes = {}, {}, {}
+        for column in COUNTED_COLUMNS:
+            codes, self.values[column] = dimension_codes(data[column])
+            self.codes[column] = codes.astype(np.int32)
+        codes, self.values['Category'] = category_codes(self.codes['Title Fiction Tag'], self.values['Title Fiction Tag'])
+        self.codes['Category'] = codes.astype(np.int32)
+
+        # Each pair occurring in the rows gets a code in value order
+        self.pair_codes = {}
+        for key, columns in GROUPED_TABLES:
+            first, second = (self.codes[column] for column in columns)
+            valid = (first >= 0) & (second >= 0)
+            combined = first.astype(np.int64) * len(self.values[columns[1]]) + second
+            pairs, inverse = np.unique(combined[valid], return_inverse=True)
+            self.codes[key] = np.full(self.n_rows, -1, dtype=np.int32)
+            self.codes[key][valid] = inverse.ravel()
+            self.pair_codes[key] = np.divmod(pairs, len(self.values[columns[1]]))
+            self.sizes[key] = len(pairs)
+        self.sizes.update((column, len(values)) for column, values in self.values.items())
+
+    def mask(self, dimension, selected):
+        """
+        Returns the packed bitset of one dimension's selection, or None if it is unrestricted.
+        """
+        if dimension == DATE_DIMENSION:
+            return self.date_index.range_bits(*selected)
+        if not selected:
+            return None
+        return self.filter_index.indexes[dimension].lookup(selected)
+
+    def state(self, signature, selections, previous=None):
+        """
+        Returns the selection state of a filter state, cached under its signature.
+
+        Parameters:
+        - signature (tuple): Normalized filter state from filter_signature().
+        - selections (dict): Its selected values per dimension; DATE_DIMENSION maps to (start, end).
+        - previous (tuple): The signature of the session's previous filter state, if any.
+
+        Returns:
+        - SelectionState: The state, patched from the previous one where possible.
+        """
+        return self.states.get_or_compute(signature, lambda: self.compute(selections, previous))
+
+    def compute(self, selections, previous):
+        prior = self.states.peek(previous) if previous is not None else None
+        changed = ([dimension for dimension in selections if selections[dimension] != prior.selections.get(dimension)]
+                   if prior is not None else None)
+        if prior is None or len(changed) != 1:
+            return self.full(selections, {dimension: self.mask(dimension, selected)
+                                          for dimension, selected in selections.items()})
+
+        dimension, = changed
+        masks = dict(prior.masks)
+        masks[dimension] = self.mask(dimension, selections[dimension])
+        bits = combine(masks.values())
+        old_bits = prior.bits if prior.bits is not None else self.all_rows
+        new_bits = bits if bits is not None else self.all_rows
+        entering = self.rows(new_bits & ~old_bits)
+        leaving = self.rows(old_bits & ~new_bits)
+        if len(entering) + len(leaving) > popcount(new_bits):
+            return self.full(selections, masks, bits)
+
+        counts = {}
+        for key, prior_counts in prior.counts.items():
+            codes = self.codes[key]
+            counts[key] = (prior_counts + self.count(codes[entering], key)) - self.count(codes[leaving], key)
+
+        # Values whose first row left are looked up again among their own rows
+        first_seen = {}
+        for _, column in RANKED_TABLES:
+            first = prior.first_seen[column].copy()
+            codes = self.codes[column]
+            left_codes = codes[leaving]
+            lost = np.unique(left_codes[(left_codes >= 0) & (first[np.maximum(left_codes, 0)] == leaving)])
+            index = self.filter_index.indexes[column]
+            for code in lost:
+                rows = index.row_ids[index.offsets[code]:index.offsets[code + 1]]
+                selected = rows[test_bits(new_bits, rows)]
+                first[code] = selected[0] if len(selected) else np.iinfo(np.int64).max
+            entering_codes = codes[entering]
+            valid = entering_codes >= 0
+            np.minimum(first, first_positions(entering_codes[valid], entering[valid], len(first)), out=first)
+            first_seen[column] = first
+        return SelectionState(selections, masks, bits, counts, first_seen, 'incremental')
+
+    def full(self, selections, masks, bits=None):
+        """
+        Counts the values of a selection from scratch.
+        """
+        bits = combine(masks.values()) if bits is None else bits
+        rows = np.arange(self.n_rows) if bits is None else self.rows(bits)
+        counts = {key: self.count(self.codes[key][rows], key)
+                  for key in COUNTED_COLUMNS + ['Category'] + [key for key, _ in GROUPED_TABLES]}
+        first_seen = {}
+        for _, column in RANKED_TABLES:
+            codes = self.codes[column][rows]
+            valid = codes >= 0
+            first_seen[column] = first_positions(codes[valid], rows[valid], self.sizes[column])
+        return SelectionState(selections, masks, bits, counts, first_seen, 'full')
+
+    def count(self, codes, key):
+        # Counts of each code, ignoring missing values
+        return np.bincount(codes[codes >= 0], minlength=self.sizes[key])
+
+    def rows(self, bits):
+        # Only the non-zero bytes are unpacked, as entering and leaving rows are usually few
+        nonzero = np.flatnonzero(bits)
+        byte_rows, offsets = np.nonzero(np.unpackbits(bits[nonzero, np.newaxis], axis=1, bitorder='little'))
+        return nonzero[byte_rows] * 8 + offsets
+
+    def overview_tables(self, state):
+        """
+        Returns the Overview count tables of a selection state, as aggregation.overview_aggregates().
+        """
+        tables = {
+            key: ranked_table(state.counts[column], state.first_seen[column], self.values[column], column)
+            for key, column in RANKED_TABLES
+        }
+        for key, columns in GROUPED_TABLES:
+            present = np.flatnonzero(state.counts[key])
+            table = {column: self.values[column][codes[present]]
+                     for column, codes in zip(columns, self.pair_codes[key])}
+            table['Count'] = state.counts[key][present]
+            tables[key] = pd.DataFrame(table)
+        return tables
+
+    def kpis(self, state):
+        """
+        Returns the unique titles, authors and publishers and the earliest and
+        latest publication dates of a selection state, NaT when there are none.
+        """
+        distinct = [int(np.count_nonzero(state.counts[column]))
+                    for column in ('Title Native Name', 'Title Author', 'Title Publisher')]
+        dates = np.flatnonzero(state.counts[DATE_DIMENSION])
+        if not len(dates):
+            return (*distinct, pd.NaT, pd.NaT)
+        return (*distinct, self.values[DATE_DIMENSION][dates[0]], self.values[DATE_DIMENSION][dates[-1]])
+
+
+def combine(masks):
+    """
+    ANDs the given packed bitsets, skipping None; returns None if all are None.
+    """
+    bits = None
+    for mask in masks:
+        if mask is not None:
+            bits = mask.copy() if bits is None else np.bitwise_and(bits, mask, out=bits)
+    return bits
+
+
+# Number of set bits of every byte value
+BYTE_POPCOUNTS = np.unpackbits(np.arange(256, dtype=np.uint8)[:, np.newaxis], axis=1).sum(axis=1)
+
+
+def popcount(bits):
+    """
+    Returns the number of rows set in a packed bitset.
+    """
+    return int(BYTE_POPCOUNTS[bits].sum())
+
+
+def test_bits(bits, rows):
+    """
+    Returns whether each of the given rows is set in a packed bitset.
+    """
+    return ((bits[rows >> 3] >> (rows & 7).astype(np.uint8)) & 1).astype(bool)
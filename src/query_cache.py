@@ -0,0 +1,149 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+
+class LRUCache:
+    """
+    Bounded least-recently-used cache with hit, miss and eviction counters.
+    """
+
+    def __init__(self, maxsize):
+        """
+        Parameters:
+        - maxsize (int): Maximum number of entries kept.
+        """
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get_or_compute(self, key, compute):
+        """
+        Returns the cached value for key, calling compute() and storing its result on a miss.
+
+        Parameters:
+        - key (hashable): Cache key, normally built from filter_signature().
+        - compute (callable): Zero-argument function producing the value.
+
+        Returns:
+        - object: The cached or freshly computed value.
+        """
+        with self.lock:
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return self.entries[key]
+            self.misses += 1
+
+        value = compute()
+
+        with self.lock:
+            self.entries[key] = value
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+                self.evictions += 1
+        return value
+
+    def peek(self, key):
+        """
+        Returns the cached value for key, or None, without counting a hit or miss.
+        """
+        with self.lock:
+            return self.entries.get(key)
+
+    def stats(self):
+        """
+        Returns the cache counters as a dict.
+        """
+        with self.lock:
+            return {
+                'size': len(self.entries),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+
+def normalize_values(values):
+    """
+    Returns a dropdown selection as a sorted tuple; None and [] both become ().
+    """
+    return tuple(sorted(set(values or [])))
+
+
+def normalize_date(value):
+    """
+    Returns a DatePickerSingle value as an ISO timestamp string, or None if unset.
+    """
+    return pd.Timestamp(value).isoformat() if value else None
+
+
+def filter_signature(selected_years, selected_subjects, selected_media,
+                     publication_start_date, publication_end_date,
+                     selected_authors, selected_publishers, selected_fiction):
+    """
+    Builds a canonical, hashable form of the filter inputs of update_charts.
+
+    Equivalent states map to the same signature regardless of selection order
+    or date string format, so they share cache entries.
+
+    Returns:
+    - tuple: The normalized filter state.
+    """
+    return (
+        normalize_values(selected_years),
+        normalize_values(selected_subjects),
+        normalize_values(selected_media),
+        normalize_date(publication_start_date),
+        normalize_date(publication_end_date),
+        normalize_values(selected_authors),
+        normalize_values(selected_publishers),
+        normalize_values(selected_fiction),
+    )
+
+
+def signature_to_json(signature):
+    """
+    Converts a filter signature to JSON-compatible lists for a dcc.Store.
+    """
+    return [list(part) if isinstance(part, tuple) else part for part in signature]
+
+
+def signature_from_json(state):
+    """
+    Restores a filter signature stored by signature_to_json().
+    """
+    return tuple(tuple(part) if isinstance(part, list) else part for part in state)
+
+
+def dataset_fingerprint(data):
+    """
+    Returns a fingerprint identifying the loaded dataset.
+
+    Uses the fingerprint recorded by data_loader (workbook hash and snapshot
+    version) when available, and hashes the frame's contents otherwise.
+    """
+    if data.attrs.get('fingerprint'):
+        return data.attrs['fingerprint']
+    return format(int(pd.util.hash_pandas_object(data, index=False).sum()) & (2**64 - 1), '016x')
+
+
+def prefix_digests(frame, lengths):
+    """
+    Returns a digest of the first n rows of a small result table for each n in lengths.
+
+    Rows are hashed once and each digest depends on the row order, so equal
+    digests mean a figure built from the prefix would not change. A missing
+    table gets None for every length.
+    """
+    if frame is None:
+        return [None] * len(lengths)
+    row_hashes = pd.util.hash_pandas_object(frame, index=False).to_numpy()
+    return [hashlib.blake2b(row_hashes[:n].tobytes(), digest_size=8).hexdigest() for n in lengths]
@@ -0,0 +1,105 @@
+import threading
+import time
+
+
+class RenderStats:
+    """
+    Per-tab counters for lazily rendered chart callbacks.
+
+    Each chart callback reports whether it rendered, was deferred because its
+    tab is hidden, or was skipped because the tab already shows the current
+    state. Render times are measured from the start of the callback to its
+    figures being ready, which is the server's share of the tab's
+    time-to-first-chart.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.tabs = {}
+
+    def tab(self, tab_id):
+        # Counters of one tab, created on first use; callers hold the lock
+        return self.tabs.setdefault(tab_id, {
+            'renders': 0,
+            'deferred': 0,
+            'reused': 0,
+            'first_chart_ms': None,
+            'last_chart_ms': None,
+            'total_ms': 0.0,
+        })
+
+    def deferred(self, tab_id):
+        """
+        Records a callback that skipped rendering because its tab is hidden.
+        """
+        with self.lock:
+            self.tab(tab_id)['deferred'] += 1
+
+    def reused(self, tab_id):
+        """
+        Records a callback that skipped rendering because the tab is up to date.
+        """
+        with self.lock:
+            self.tab(tab_id)['reused'] += 1
+
+    def rendered(self, tab_id, started):
+        """
+        Records a completed render.
+
+        Parameters:
+        - tab_id (str): The tab the rendered figures belong to.
+        - started (float): time.perf_counter() value taken when the callback started.
+        """
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self.lock:
+            counters = self.tab(tab_id)
+            counters['renders'] += 1
+            counters['total_ms'] += elapsed_ms
+            counters['last_chart_ms'] = elapsed_ms
+            if counters['first_chart_ms'] is None:
+                counters['first_chart_ms'] = elapsed_ms
+
+    def stats(self):
+        """
+        Returns the counters of every tab, with the mean render time, as a dict.
+        """
+        with self.lock:
+            return {
+                tab_id: {
+                    **counters,
+                    'mean_chart_ms': counters['total_ms'] / counters['renders'] if counters['renders'] else None,
+                }
+                for tab_id, counters in self.tabs.items()
+            }
+
+
+class PathStats:
+    """
+    Counts which path served each request of a group of outputs.
+
+    Paths are 'cache' when every output was cached, 'cube' when the missing
+    outputs were computed from the pre-aggregated cube, 'sql' when they were
+    queried from the configured SQL backend, 'incremental' when the selection
+    was patched from the session's previous one, 'full' when it was counted
+    from scratch by the incremental filter engine, and 'rows' when the
+    filtered rows had to be scanned.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.outputs = {}
+
+    def served(self, output, path):
+        """
+        Records that a request for output was served by path.
+        """
+        with self.lock:
+            counters = self.outputs.setdefault(output, {'cache': 0, 'cube': 0, 'sql': 0, 'incremental': 0, 'full': 0, 'rows': 0})
+            counters[path] += 1
+
+    def stats(self):
+        """
+        Returns the counters of every output group as a dict.
+        """
+        with self.lock:
+            return {output: dict(counters) for output, counters in self.outputs.items()}
@@ -0,0 +1,296 @@
+import array
+import logging
+import os
+import pickle
+import re
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Characters treated as word separators when matching the start of a word
+WORD_SEPARATORS = re.compile(r'[\W_]+')
+
+# Fuzzy matches need to contain at least this share of the query's trigrams
+MIN_SIMILARITY = 0.5
+
+# Columns searched by the dashboard's dropdowns
+SEARCHED_COLUMNS = ['Title Native Name', 'Title Author', 'Title Publisher']
+
+# File the indexes are kept in, next to the dataset snapshot; bump the version
+# whenever SearchIndex or TrigramIndex change so stored indexes are rebuilt
+SEARCH_INDEX_FILE = 'search_index.pickle'
+SEARCH_INDEX_VERSION = 1
+
+
+def normalize(text):
+    """
+    Returns text casefolded, with every separator run replaced by one space.
+    """
+    return WORD_SEPARATORS.sub(' ', text.casefold()).strip()
+
+
+def trigrams(text):
+    """
+    Returns the set of character trigrams of a normalized text.
+
+    Each word is padded with two leading spaces and one trailing space, as
+    PostgreSQL's pg_trgm does, so that short words and word starts count.
+    """
+    grams = set()
+    for word in text.split():
+        padded = f'  {word} '
+        grams.update(padded[i:i + 3] for i in range(len(padded) - 2))
+    return grams
+
+
+class TrigramIndex:
+    """
+    Inverted index from character trigrams to the ids of the strings containing them.
+
+    Strings are added incrementally: each one gets the next id, and only its
+    own trigrams are appended to the posting lists, which are growable int32
+    arrays read by NumPy without copying.
+    """
+
+    def __init__(self):
+        self.postings = {}
+        self.sizes = array.array('i')
+
+    def __len__(self):
+        return len(self.sizes)
+
+    def add(self, text):
+        """
+        Indexes a normalized string under the next id and returns that id.
+        """
+        string_id = len(self.sizes)
+        grams = trigrams(text)
+        for gram in grams:
+            self.postings.setdefault(gram, array.array('i')).append(string_id)
+        self.sizes.append(len(grams))
+        return string_id
+
+    def containing(self, text):
+        """
+        Returns the ids of the strings that may contain a normalized text as a substring.
+
+        Every trigram within a word of the text occurs in such strings, so the
+        shortest posting list among them is a superset of the matches. Texts
+        whose words are all shorter than three characters are only looked up
+        at word starts, through the padded trigrams of their first word.
+        """
+        grams = {word[i:i + 3] for word in text.split() for i in range(len(word) - 2)}
+        if not grams and text:
+            padded = f'  {text.split()[0]}'
+            grams = {padded[i:i + 3] for i in range(len(padded) - 2)}
+        if not grams:
+            return np.empty(0, dtype=np.int32)
+        if not all(gram in self.postings for gram in grams):
+            return np.empty(0, dtype=np.int32)
+        return np.frombuffer(min((self.postings[gram] for gram in grams), key=len), dtype=np.int32)
+
+    def search(self, text, limit, tiebreak=None):
+        """
+        Returns the ids of the strings most similar to a normalized query.
+
+        Strings are scored by the share of the query's trigrams they contain, so
+        that a typed fragment of a long value still matches; equal scores are
+        ordered by the Jaccard similarity of the trigram sets, which favours
+        strings without many trigrams beyond the query.
+
+        Parameters:
+        - text (str): The normalized query.
+        - limit (int): Maximum number of ids returned.
+        - tiebreak (ndarray): Optional sort key per id for equal scores; ids are used otherwise.
+
+        Returns:
+        - tuple: (ids, scores) arrays, best first.
+        """
+        grams = trigrams(text)
+        lists = [np.frombuffer(self.postings[gram], dtype=np.int32) for gram in grams if gram in self.postings]
+        if not lists:
+            return np.empty(0, dtype=np.int64), np.empty(0)
+
+        # Trigrams shared with the query, per string
+        shared = np.bincount(np.concatenate(lists), minlength=len(self.sizes))
+        candidates = np.flatnonzero(shared >= len(grams) * MIN_SIMILARITY)
+        shared = shared[candidates]
+        scores = shared / len(grams)
+        jaccard = shared / (len(grams) + np.frombuffer(self.sizes, dtype=np.int32)[candidates] - shared)
+        order = np.lexsort((candidates if tiebreak is None else tiebreak[candidates], -jaccard, -scores))[:limit]
+        return candidates[order], scores[order]
+
+
+class SearchIndex:
+    """
+    Case-insensitive search over the distinct values of one column, tolerant of typos.
+
+    Exact matches are ranked by where the query occurs: at the start of the
+    value, at the start of a later word, or anywhere else. When they do not
+    fill the requested number of results, values sharing enough trigrams with
+    the query follow, most similar first. Values of the same rank keep their
+    sorted order.
+
+    Prefix matches are found by bisection over the sorted keys, and the
+    substring and trigram scans are skipped when they already fill the
+    results. Queries made only of one- and two-letter words match other
+    values at word starts only. New values are added incrementally with add().
+    """
+
+    def __init__(self, values=()):
+        """
+        Parameters:
+        - values (iterable): The distinct values to search, e.g. the categories of a column.
+        """
+        self.values = []
+        self.positions = {}
+        self.trigram_index = TrigramIndex()
+        self.add(values)
+
+    def add(self, values):
+        """
+        Adds the values not indexed yet, e.g. those of a newly loaded dataset.
+
+        Only the new values are tokenized into the trigram index; the sorted
+        key arrays are merged with them.
+
+        Returns:
+        - int: Number of values added.
+        """
+        new_values = sorted({str(value) for value in values} - self.positions.keys())
+        if not new_values and self.values:
+            return 0
+        for value in new_values:
+            self.positions[value] = len(self.values)
+            self.values.append(value)
+            self.trigram_index.add(normalize(value))
+
+        # Lowercased keys by value id, sorted for the prefix bisection, and the
+        # sorted position of each value, which orders results of equal rank
+        new_keys = np.array([value.casefold() for value in new_values], dtype=str)
+        new_word_keys = np.array([' ' + normalize(value) for value in new_values], dtype=str)
+        if new_values and len(self.values) > len(new_values):
+            self.keys = np.concatenate([self.keys, new_keys])
+            self.word_keys = np.concatenate([self.word_keys, new_word_keys])
+        else:
+            self.keys, self.word_keys = new_keys, new_word_keys
+        self.key_order = np.argsort(self.keys, kind='stable')
+        self.sorted_keys = self.keys[self.key_order]
+        self.value_order = np.argsort(np.array(self.values, dtype=object), kind='stable')
+        self.sort_rank = np.empty(len(self.values), dtype=np.int64)
+        self.sort_rank[self.value_order] = np.arange(len(self.values))
+        return len(new_values)
+
+    def prefix_matches(self, key):
+        """
+        Returns the ids of the values starting with key, in sorted order.
+        """
+        low = np.searchsorted(self.sorted_keys, key, side='left')
+        high = np.searchsorted(self.sorted_keys, key + '\U0010ffff', side='left')
+        ids = self.key_order[low:high]
+        return ids[np.argsort(self.sort_rank[ids], kind='stable')]
+
+    def matches(self, query, limit=50):
+        """
+        Returns the best matches for a search string with how they matched.
+
+        Parameters:
+        - query (str): The text typed into the dropdown.
+        - limit (int): Maximum number of values returned.
+
+        Returns:
+        - list: (value, match, score) tuples, best first, where match is 'prefix',
+          'word', 'substring' or 'fuzzy' and score is the share of the query's
+          trigrams in a fuzzy match (1.0 for exact ones). An empty query returns the first
+          values in sorted order as prefix matches.
+        """
+        key = (query or '').strip().casefold()
+        if not key:
+            return [(self.values[i], 'prefix', 1.0) for i in self.value_order[:limit]]
+
+        results = [(i, 'prefix', 1.0) for i in self.prefix_matches(key)[:limit]]
+        if len(results) < limit:
+            # Rank the other exact matches, checking only the values the trigram
+            # index lets through: word starts first, then any other substring
+            candidates = self.trigram_index.containing(normalize(key))
+            candidates = candidates[~np.isin(candidates, [i for i, _, _ in results])]
+            found = candidates[np.char.find(self.keys[candidates], key) >= 0]
+            word_start = np.char.find(self.word_keys[found], ' ' + normalize(key)) >= 0
+            for match, ids in (('word', found[word_start]), ('substring', found[~word_start])):
+                ids = ids[np.argsort(self.sort_rank[ids], kind='stable')]
+                results.extend((i, match, 1.0) for i in ids[:limit - len(results)])
+
+        if len(results) < limit:
+            # Fill up with the most similar values by shared trigrams
+            seen = {i for i, _, _ in results}
+            ids, scores = self.trigram_index.search(normalize(key), limit + len(seen), self.sort_rank)
+            results.extend((i, 'fuzzy', float(score)) for i, score in zip(ids, scores) if i not in seen)
+        return [(self.values[i], match, score) for i, match, score in results[:limit]]
+
+    def search(self, query, limit=50):
+        """
+        Returns the best matching values for a search string, best first.
+        """
+        return [value for value, _, _ in self.matches(query, limit)]
+
+
+def read_search_indexes(path):
+    """
+    Returns the indexes stored by write_search_indexes(), or {} if there are none of the current version.
+    """
+    try:
+        with open(path, 'rb') as f:
+            stored = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError):
+        return {}
+    if not isinstance(stored, dict) or stored.get('version') != SEARCH_INDEX_VERSION:
+        return {}
+    return stored['indexes']
+
+
+def write_search_indexes(indexes, path):
+    """
+    Stores search indexes by column, replacing the previous file atomically.
+    """
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    tmp_path = f'{path}.{os.getpid()}.tmp'
+    with open(tmp_path, 'wb') as f:
+        pickle.dump({'version': SEARCH_INDEX_VERSION, 'indexes': indexes}, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp_path, path)
+
+
+def update_search_indexes(data, path, columns=SEARCHED_COLUMNS):
+    """
+    Returns the search indexes of a loaded dataset, indexing only the values earlier loads did not.
+
+    The indexes stored at path are read back and the values the dataset adds
+    are appended with SearchIndex.add(); an index is rebuilt from scratch only
+    when the dataset no longer holds some of its values. Changed indexes are
+    written back, so that the gunicorn master builds them once next to the
+    published snapshot and the workers only read them.
+
+    Parameters:
+    - data (DataFrame): The preprocessed dataset.
+    - path (str): File the indexes are kept in.
+    - columns (list): Categorical columns to index.
+
+    Returns:
+    - tuple: (indexes, added) where indexes maps each column to its
+      SearchIndex and added to the number of values indexed by this call.
+    """
+    stored = read_search_indexes(path)
+    indexes, added = {}, {}
+    for column in columns:
+        values = [str(value) for value in data[column].cat.categories]
+        index = stored.get(column)
+        if index is None or not index.positions.keys() <= set(values):
+            index = SearchIndex()
+        added[column] = index.add(values)
+        indexes[column] = index
+    if any(added.values()) or indexes.keys() != stored.keys():
+        try:
+            write_search_indexes(indexes, path)
+        except OSError as exc:
+            logger.warning("Could not store search indexes in %s: %s", path, exc)
+    return indexes, added
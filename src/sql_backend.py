@@ -0,0 +1,210 @@
+import sqlite3
+import threading
+from abc import ABC, abstractmethod
+
+import numpy as np
+import pandas as pd
+
+from aggregation import GROUPED_TABLES, RANKED_TABLES, category_codes, sort_counts
+from cube import dimension_codes
+
+# Columns loaded into the engine, by their SQL name; values are stored as the
+# integer codes of their sorted distinct values, -1 for missing ones
+SQL_COLUMNS = {
+    'Txn Calendar Year': 'txn_year',
+    'Subject': 'subject',
+    'Item Media': 'media',
+    'Title Author': 'author',
+    'Title Publisher': 'publisher',
+    'Title Fiction Tag': 'fiction',
+    'Title Native Name': 'title',
+    'Publication Year': 'publication_year',
+    'Title Publication Date': 'publication_date',
+}
+
+class QueryBackend(ABC):
+    """
+    Filtering and Overview aggregation in an embedded SQL engine.
+
+    The dataset is loaded once as a table of integer codes. Each filter state
+    becomes one parameterized query per chart that returns only that chart's
+    count table, in the order and with the values overview_aggregates()
+    returns, and one query for the KPI values. Subclasses open the connection
+    and bulk-load the table.
+    """
+
+    # Placeholder for query parameters
+    placeholder = '?'
+
+    def __init__(self, data):
+        """
+        Parameters:
+        - data (DataFrame): The preprocessed dataset.
+        """
+        self.lock = threading.Lock()
+        self.values = {}
+        codes = {'row_id': np.arange(len(data), dtype=np.int64)}
+        for column, name in SQL_COLUMNS.items():
+            codes[name], self.values[column] = dimension_codes(data[column])
+        codes['category'], self.values['Category'] = category_codes(codes['fiction'], self.values['Title Fiction Tag'])
+        self.names = {**SQL_COLUMNS, 'Category': 'category'}
+        self.connection = self.connect()
+        self.load(pd.DataFrame(codes))
+
+    @abstractmethod
+    def connect(self):
+        """
+        Returns a connection to a new in-memory database.
+        """
+
+    @abstractmethod
+    def load(self, codes):
+        """
+        Creates the rows table from a frame of int64 code columns.
+        """
+
+    def query(self, sql, parameters):
+        """
+        Runs a query and returns all result rows as a list of tuples.
+        """
+        with self.lock:
+            return self.connection.execute(sql, parameters).fetchall()
+
+    def where(self, selections, start_date=None, end_date=None, columns=()):
+        """
+        Translates a filter state into a WHERE clause and its parameters.
+
+        Parameters:
+        - selections (dict): Column name -> selected values; empty selections apply no filter.
+        - start_date, end_date (str or None): Inclusive publication date range, as DateIndex.range_bits().
+        - columns (iterable): Columns whose missing values are excluded, e.g. the grouped ones.
+
+        Returns:
+        - tuple: (clause, parameters)
+        """
+        clauses, parameters = [], []
+        for column, selected_values in selections.items():
+            if not selected_values:
+                continue
+            codes = self.values[column].get_indexer(pd.Index(selected_values))
+            codes = sorted({int(code) for code in codes if code >= 0})
+            if not codes:
+                clauses.append('1 = 0')
+                continue
+            clauses.append(f"{self.names[column]} IN ({', '.join([self.placeholder] * len(codes))})")
+            parameters.extend(codes)
+
+        # Dates are coded in sorted order, so a date range is a range of codes
+        if start_date or end_date:
+            dates = self.values['Title Publication Date']
+            low = int(dates.searchsorted(pd.to_datetime(start_date), side='left')) if start_date else 0
+            high = int(dates.searchsorted(pd.to_datetime(end_date), side='right')) - 1 if end_date else len(dates) - 1
+            clauses.append(f'publication_date BETWEEN {self.placeholder} AND {self.placeholder}')
+            parameters.extend([low, high])
+
+        clauses.extend(f'{self.names[column]} >= 0' for column in columns)
+        return ' AND '.join(clauses) or '1 = 1', parameters
+
+    def overview_tables(self, selections, start_date=None, end_date=None):
+        """
+        Returns the Overview count tables of a filter state, as aggregation.overview_aggregates().
+        """
+        tables = {}
+        for key, column in RANKED_TABLES:
+            name = self.names[column]
+            clause, parameters = self.where(selections, start_date, end_date, [column])
+            rows = self.query(
+                f'SELECT {name}, COUNT(*) FROM rows WHERE {clause} '
+                f'GROUP BY {name} ORDER BY MIN(row_id)', parameters)
+            codes, counts = self.result_columns(rows, 2)
+            tables[key] = sort_counts(counts, self.values[column][codes], column)
+
+        for key, columns in GROUPED_TABLES:
+            group_names = ', '.join(self.names[column] for column in columns)
+            clause, parameters = self.where(selections, start_date, end_date, columns)
+            rows = self.query(
+                f'SELECT {group_names}, COUNT(*) FROM rows WHERE {clause} '
+                f'GROUP BY {group_names} ORDER BY {group_names}', parameters)
+            *codes, counts = self.result_columns(rows, len(columns) + 1)
+            table = {column: self.values[column][column_codes] for column, column_codes in zip(columns, codes)}
+            table['Count'] = counts
+            tables[key] = pd.DataFrame(table)
+        return tables
+
+    def kpis(self, selections, start_date=None, end_date=None):
+        """
+        Returns the unique titles, authors and publishers and the earliest and
+        latest publication dates of a filter state, NaT when there are none.
+        """
+        clause, parameters = self.where(selections, start_date, end_date)
+        counted = ', '.join(f'COUNT(DISTINCT CASE WHEN {name} >= 0 THEN {name} END)'
+                            for name in ('title', 'author', 'publisher'))
+        (titles, authors, publishers, earliest, latest), = self.query(
+            f'SELECT {counted}, MIN(CASE WHEN publication_date >= 0 THEN publication_date END), '
+            f'MAX(publication_date) FROM rows WHERE {clause}', parameters)
+        dates = self.values['Title Publication Date']
+        return (titles, authors, publishers,
+                dates[earliest] if earliest is not None else pd.NaT,
+                dates[latest] if latest is not None and latest >= 0 else pd.NaT)
+
+    @staticmethod
+    def result_columns(rows, width):
+        """
+        Returns the columns of an all-integer query result as int64 arrays.
+        """
+        result = np.array(rows, dtype=np.int64).reshape(len(rows), width)
+        return [result[:, i] for i in range(width)]
+
+
+class SQLiteBackend(QueryBackend):
+    """
+    Query backend on an in-memory SQLite database, from the standard library.
+    """
+
+    def connect(self):
+        # Callbacks run in worker threads; queries are serialized by self.lock
+        return sqlite3.connect(':memory:', check_same_thread=False)
+
+    def load(self, codes):
+        columns = ', '.join(f'{name} INTEGER NOT NULL' for name in codes.columns if name != 'row_id')
+        with self.connection:
+            self.connection.execute(f'CREATE TABLE rows (row_id INTEGER PRIMARY KEY, {columns})')
+            self.connection.executemany(
+                f"INSERT INTO rows VALUES ({', '.join('?' * len(codes.columns))})",
+                zip(*(codes[name].tolist() for name in codes.columns)))
+
+
+class DuckDBBackend(QueryBackend):
+    """
+    Query backend on an in-memory DuckDB database; needs the duckdb package.
+    """
+
+    def connect(self):
+        import duckdb
+        return duckdb.connect(':memory:')
+
+    def load(self, codes):
+        self.connection.register('codes', codes)
+        self.connection.execute('CREATE TABLE rows AS SELECT * FROM codes')
+        self.connection.unregister('codes')
+
+
+# Query backends selectable by name; 'pandas' keeps the in-process pandas/NumPy path
+QUERY_BACKENDS = {
+    'pandas': None,
+    'sqlite': SQLiteBackend,
+    'duckdb': DuckDBBackend,
+}
+
+
+def open_backend(name, data):
+    """
+    Loads the dataset into the named query backend.
+
+    Returns:
+    - QueryBackend or None: The backend, or None for 'pandas'.
+    """
+    if name not in QUERY_BACKENDS:
+        raise ValueError(f"Unknown query backend {name!r}; expected one of {', '.join(QUERY_BACKENDS)}")
+    backend = QUERY_BACKENDS[name]
+    return backend(data) if backend else None
@@ -0,0 +1,65 @@
+import numpy as np
+import pandas as pd
+
+
+def truncate_titles(titles, max_title_length=55):
+    """
+    Shortens titles longer than max_title_length to fit a tooltip line.
+
+    Parameters:
+    - titles (Index): Title strings, e.g. the categories of the title column.
+    - max_title_length (int): Maximum number of characters for each title.
+
+    Returns:
+    - ndarray: Object array of the display titles, aligned with titles, plus a
+      trailing "nan" entry so that missing titles (code -1) display as before.
+    """
+    titles = pd.Index(titles).astype(str)
+    truncated = np.where(titles.str.len() > max_title_length,
+                         titles.str[:max_title_length - 3] + '...', titles)
+    return np.append(truncated.astype(object), 'nan')
+
+
+def format_ranks(ranks):
+    """
+    Formats a rank column as strings, with "N/A" for missing ranks.
+
+    Each distinct rank is formatted once and looked up by its factorized code.
+    """
+    codes, values = pd.factorize(ranks)
+    labels = np.array([str(value) for value in values] + ['N/A'], dtype=object)
+    return labels[codes]
+
+
+def rank_tooltips(groups, titles, ranks, max_display=10):
+    """
+    Builds the "Title: Rank" tooltip of every group at once.
+
+    Each tooltip lists the first max_display rows of its group in row order,
+    separated by line breaks, and ends with "..." if the group has more rows.
+
+    Parameters:
+    - groups (ndarray): Non-negative group code of each row, e.g. author codes.
+    - titles (ndarray): Display title of each row (see truncate_titles()).
+    - ranks (ndarray): Formatted rank of each row (see format_ranks()).
+    - max_display (int): Maximum number of title-rank pairs per tooltip.
+
+    Returns:
+    - Series: Tooltip strings indexed by group code.
+    """
+    # Order rows by group, keeping row order within each group, and number them
+    order = np.argsort(groups, kind='stable')
+    sorted_groups = groups[order]
+    starts = np.flatnonzero(np.r_[True, sorted_groups[1:] != sorted_groups[:-1]]) if len(order) else order
+    sizes = np.diff(np.r_[starts, len(order)])
+    position = np.arange(len(order)) - np.repeat(starts, sizes)
+
+    # Join the first max_display entries of each group
+    shown = order[position < max_display]
+    entries = pd.Series(titles[shown] + ': ' + ranks[shown], dtype=object)
+    tooltips = entries.groupby(groups[shown], sort=True).agg('<br>'.join)
+
+    # Indicate groups with additional titles not displayed
+    truncated = sorted_groups[starts][sizes > max_display]
+    tooltips.loc[truncated] = tooltips.loc[truncated] + '<br>...'
+    return tooltips